@@ -1,13 +1,229 @@
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QTabWidget, QTableWidget, QTableWidgetItem
+    QWidget, QVBoxLayout, QTabWidget, QTableView, QLineEdit, QAbstractItemView
 )
-from PyQt6.QtWebEngineWidgets import QWebEngineView
-import plotly.graph_objects as go
+from PyQt6.QtCore import Qt, QAbstractTableModel, QAbstractProxyModel, QModelIndex
+import numpy as np
 import pandas as pd
 import os
+from columnar_export import is_columnar, read_columnar
+
+def read_table(file_path):
+    # The pyarrow CSV engine is several times faster on large statements;
+    # fall back to the default parser when it isn't installed or can't handle
+    # the file (e.g. the ragged summary rows of the grouped CSV).
+    try:
+        return pd.read_csv(file_path, engine="pyarrow")
+    except (ImportError, ValueError, pd.errors.ParserError):
+        return pd.read_csv(file_path)
+
+class DataFrameTableModel(QAbstractTableModel):
+    # Read-only model over the columns of a DataFrame. Cell text is only built
+    # for the cells the view asks for.
+    def __init__(self, df):
+        super().__init__()
+        self.headers = [str(c) for c in df.columns]
+        self.columns = [df[c].to_numpy() for c in df.columns]
+        self.row_count = len(df)
+        self.sort_keys = {}
+        self.search_columns = None  # lower-cased text columns, built on first filter
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        val = self.columns[index.column()][index.row()]
+        return "" if pd.isna(val) else str(val)
+
+    def column(self, column):
+        return self.columns[column]
+
+    def sort_key(self, column):
+        # Columns of numbers and amounts like "₹120.00" sort by value, other
+        # text as text.
+        if column not in self.sort_keys:
+            keys = pd.Series(self.column(column))
+            if keys.dtype == object or pd.api.types.is_string_dtype(keys):
+                keys = keys.astype(str).where(keys.notna())
+                numbers = pd.to_numeric(keys.str.replace('₹', '').str.replace(',', ''), errors='coerce')
+                if numbers.notna().sum() == keys.notna().sum():
+                    keys = numbers
+            self.sort_keys[column] = keys
+        return self.sort_keys[column]
+
+    def sort_order(self, column, ascending=True):
+        # Row positions sorted by column.
+        keys = self.sort_key(column)
+        return keys.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+
+    def matching_rows(self, text):
+        # Boolean mask of rows where any cell contains text (case-insensitive).
+        if self.search_columns is None:
+            self.search_columns = [pd.Series(self.column(c)).fillna("").astype(str).str.lower()
+                                   for c in range(self.columnCount())]
+        mask = np.zeros(self.row_count, dtype=bool)
+        for col in self.search_columns:
+            mask |= col.str.contains(text.lower(), regex=False).to_numpy(dtype=bool)
+        return mask
+
+class RowsTableModel(DataFrameTableModel):
+    # The same model over CSV-style rows (header first) kept in memory by
+    # fused_writer.write_outputs, so nothing is re-read from disk. Columns
+    # are only built when a sort or filter needs them.
+    def __init__(self, rows):
+        QAbstractTableModel.__init__(self)
+        self.headers = [str(h) for h in rows[0]]
+        self.body = [row for row in rows[1:] if row]  # blank rows are skipped, like read_csv
+        self.row_count = len(self.body)
+        self.column_cache = {}
+        self.sort_keys = {}
+        self.search_columns = None
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        row = self.body[index.row()]
+        val = row[index.column()] if index.column() < len(row) else None
+        # strip() drops the tab in front of UTR numbers, which is only there
+        # to keep spreadsheets from reading them as numbers.
+        return "" if val is None else str(val).strip()
+
+    def column(self, column):
+        if column not in self.column_cache:
+            self.column_cache[column] = np.array(
+                [row[column] if column < len(row) else None for row in self.body], dtype=object)
+        return self.column_cache[column]
+
+class ArrowTableModel(DataFrameTableModel):
+    # The same model over a pyarrow Table, e.g. a memory-mapped .arrow file.
+    # Cells are converted only when shown; sorting and filtering run in
+    # Arrow's compute kernels.
+    def __init__(self, table):
+        QAbstractTableModel.__init__(self)
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        self.pa = pa
+        self.pc = pc
+        self.headers = [str(name) for name in table.column_names]
+        self.columns = table.columns
+        self.row_count = table.num_rows
+        self.sort_keys = {}
+        self.search_columns = None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        val = self.columns[index.column()][index.row()].as_py()
+        return "" if val is None else str(val)
+
+    def sort_key(self, column):
+        if column not in self.sort_keys:
+            col = self.columns[column]
+            if self.pa.types.is_dictionary(col.type):
+                col = col.cast(self.pa.string())
+            self.sort_keys[column] = col
+        return self.sort_keys[column]
+
+    def sort_order(self, column, ascending=True):
+        order = "ascending" if ascending else "descending"
+        indices = self.pc.array_sort_indices(self.sort_key(column), order=order, null_placement="at_end")
+        return indices.to_numpy()
+
+    def matching_rows(self, text):
+        if self.search_columns is None:
+            self.search_columns = [col.cast(self.pa.string()) for col in self.columns]
+        mask = np.zeros(self.row_count, dtype=bool)
+        for col in self.search_columns:
+            found = self.pc.match_substring(col, text, ignore_case=True).fill_null(False)
+            mask |= found.to_numpy(zero_copy_only=False)
+        return mask
+
+class DataFrameProxyModel(QAbstractProxyModel):
+    # Sort/filter proxy that keeps the visible source rows in a numpy array.
+    # Sorting and filtering are computed in one vectorized pass over the
+    # source columns rather than by comparing or testing rows one at a time.
+    def __init__(self):
+        super().__init__()
+        self.rows = np.arange(0)
+        self.order = None  # sorted source rows, None for source order
+        self.mask = None   # rows matching the filter, None when not filtering
+        self.inverse = None
+
+    def setSourceModel(self, model):
+        self.beginResetModel()
+        super().setSourceModel(model)
+        self.order = None
+        self.mask = None
+        self.update_rows()
+        self.endResetModel()
+
+    def update_rows(self):
+        rows = self.order if self.order is not None else np.arange(self.sourceModel().rowCount())
+        self.rows = rows if self.mask is None else rows[self.mask[rows]]
+        self.inverse = None
+
+    def set_filter_text(self, text):
+        self.beginResetModel()
+        self.mask = self.sourceModel().matching_rows(text) if text else None
+        self.update_rows()
+        self.endResetModel()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.beginResetModel()
+        if column < 0:
+            self.order = None
+        else:
+            self.order = self.sourceModel().sort_order(column, order == Qt.SortOrder.AscendingOrder)
+        self.update_rows()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.sourceModel().columnCount()
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not 0 <= row < len(self.rows) or not 0 <= column < self.columnCount():
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(int(self.rows[proxy_index.row()]), proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        if self.inverse is None:
+            self.inverse = np.full(self.sourceModel().rowCount(), -1)
+            self.inverse[self.rows] = np.arange(len(self.rows))
+        row = int(self.inverse[source_index.row()])
+        return self.index(row, source_index.column()) if row >= 0 else QModelIndex()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Vertical:
+            return str(section + 1) if role == Qt.ItemDataRole.DisplayRole else None
+        return self.sourceModel().headerData(section, orientation, role)
 
 class TransactionViewer(QWidget):
-    def __init__(self, all_path, grouped_path=None, cashew_path=None):
+    def __init__(self, all_path, grouped_path=None, cashew_path=None, dashboard=None, tables=None):
         super().__init__()
         self.setWindowTitle("Transaction Viewer")
         self.resize(1000, 600)
@@ -15,6 +231,8 @@ class TransactionViewer(QWidget):
         self.all_path = all_path
         self.grouped_path = grouped_path
         self.cashew_path = cashew_path
+        self.dashboard = dashboard  # dashboard aggregates, saves loading <statement>_summary.json
+        self.tables = tables    # fused_writer.OutputTables, saves re-reading the CSVs for the tabs
 
         self.layout = QVBoxLayout()
         self.setLayout(self.layout)
@@ -25,13 +243,13 @@ class TransactionViewer(QWidget):
         # All transactions tab
         self.all_tab = QWidget()
         self.tabs.addTab(self.all_tab, "All Transactions")
-        self.init_tab(self.all_tab, self.all_path)
+        self.init_tab(self.all_tab, self.all_path, self.table_rows("plain"))
 
         # Grouped summary tab
-        if self.grouped_path and os.path.exists(self.grouped_path):
+        if self.table_rows("grouped") or (self.grouped_path and os.path.exists(self.grouped_path)):
             self.grouped_tab = QWidget()
             self.tabs.addTab(self.grouped_tab, "Grouped Summary")
-            self.init_tab(self.grouped_tab, self.grouped_path)
+            self.init_tab(self.grouped_tab, self.grouped_path, self.table_rows("grouped"))
             print("Grouped summary CSV found:", self.grouped_path)
             print("Adding Summary (Pie Chart) tab...")
 
@@ -39,138 +257,76 @@ class TransactionViewer(QWidget):
             print("Number of tabs after adding summary tab:", self.tabs.count())
 
         # Cashew export tab
-        if self.cashew_path and os.path.exists(self.cashew_path):
+        if self.table_rows("cashew") or (self.cashew_path and os.path.exists(self.cashew_path)):
             self.cashew_tab = QWidget()
             self.tabs.addTab(self.cashew_tab, "Cashew Export")
-            self.init_tab(self.cashew_tab, self.cashew_path)
+            self.init_tab(self.cashew_tab, self.cashew_path, self.table_rows("cashew"))
+
+    def table_rows(self, name):
+        return getattr(self.tables, name, None) if self.tables is not None else None
 
-    def init_tab(self, tab, file_path):
+    def init_tab(self, tab, file_path, rows=None):
         layout = QVBoxLayout()
         tab.setLayout(layout)
 
-        table = QTableWidget()
+        filter_line = QLineEdit()
+        filter_line.setPlaceholderText("Filter rows...")
+        layout.addWidget(filter_line)
+
+        table = QTableView()
+        table.setSortingEnabled(True)
+        table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        table.horizontalHeader().setSortIndicatorShown(False)
         layout.addWidget(table)
 
         tab.table = table
+        tab.filter_line = filter_line
         tab.file_path = file_path
+        tab.rows = rows
 
         self.load_data(tab)
 
     def load_data(self, tab):
-        df = pd.read_csv(tab.file_path)
-
-        table = tab.table
-        table.clear()
-        table.setRowCount(len(df))
-        table.setColumnCount(len(df.columns))
-        table.setHorizontalHeaderLabels(df.columns)
-
-        for row_idx, row in df.iterrows():
-            for col_idx, val in enumerate(row):
-                table.setItem(row_idx, col_idx, QTableWidgetItem(str(val)))
+        if tab.rows is not None:
+            tab.model = RowsTableModel(tab.rows)
+        elif is_columnar(tab.file_path):
+            tab.model = ArrowTableModel(read_columnar(tab.file_path))
+        else:
+            tab.model = DataFrameTableModel(read_table(tab.file_path))
+        tab.proxy = DataFrameProxyModel()
+        tab.proxy.setSourceModel(tab.model)
+        tab.table.setModel(tab.proxy)
+        tab.filter_line.textChanged.connect(tab.proxy.set_filter_text)
 
     def add_summary_chart_tab(self, grouped_path):
         try:
-            df = pd.read_csv(grouped_path)
-
-            if 'Payee' in df.columns and 'Total Amount' in df.columns:
-                # Clean and prepare
-                df['Amount'] = df['Total Amount'].astype(str).str.replace('₹', '').str.replace(',', '').str.strip()
-                df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce')
-                df = df[df['Amount'].notna() & (df['Amount'] > 0)]
-
-                df_sorted = df.sort_values(by='Amount', ascending=False)
-                top_15 = df_sorted.head(15)
-                others = df_sorted.iloc[15:]
-
-                others_total = others['Amount'].sum()
-
-                final_labels = top_15['Payee'].tolist()
-                final_values = top_15['Amount'].tolist()
-
-                if others_total > 0:
-                    final_labels.append("Others")
-                    final_values.append(others_total)
-
-                # Pie chart
-                fig = go.Figure(
-                    data=[go.Pie(
-                        labels=final_labels,
-                        values=final_values,
-                        hovertemplate='%{label}<br>₹%{value:,.2f}<br>%{percent}',
-                        textinfo='percent',
-                        name=''
-                    )]
-                )
-                fig.update_layout(title_text="Top 15 Groups + Others (Transaction Summary)")
-
-                # Summary stats
-                most_sent_to = top_15.iloc[0]['Payee']
-                most_sent_amt = top_15.iloc[0]['Amount']
-
-                # Load all transactions
-                try:
-                    all_df = pd.read_csv(self.all_path)
-                    all_df['Amount'] = all_df['Amount'].astype(str).str.replace('₹', '').str.replace(',',
-                                                                                                     '').str.strip()
-                    all_df['Amount'] = pd.to_numeric(all_df['Amount'], errors='coerce')
-                    all_df['Date'] = pd.to_datetime(all_df['Date'], errors='coerce')
-
-                    debits = all_df[all_df['Type'].str.lower() == 'debit']
-                    day_spend = debits.groupby(debits['Date'].dt.date)['Amount'].sum()
-                    most_spent_day = day_spend.idxmax()
-                    most_spent_day_amt = day_spend.max()
-
-                    date_range = (debits['Date'].max() - debits['Date'].min()).days + 1
-                    total_spent = debits['Amount'].sum()
-                    avg_daily = total_spent / date_range
-                    avg_weekly = avg_daily * 7
-                    avg_monthly = avg_daily * 30
-
-                except Exception as e:
-                    print("Failed to load all transaction stats:", e)
-                    most_spent_day = "N/A"
-                    most_spent_day_amt = avg_daily = avg_weekly = avg_monthly = 0
-
-                stats_html = f"""
-                <div style="
-                    position: fixed;
-                    bottom: 20px;
-                    right: 20px;
-                    background-color: rgba(255, 255, 255, 0.95);
-                    padding: 10px 14px;
-                    border-radius: 10px;
-                    font-family: Arial, sans-serif;
-                    font-size: 12px;
-                    color: #222;
-                    box-shadow: 0 3px 8px rgba(0, 0, 0, 0.1);
-                    max-width: 260px;
-                    z-index: 9999;
-                    line-height: 1.3;
-                ">
-                    <b style="font-size: 14px; display: block; margin-bottom: 8px; color: #333;">Summary Stats</b>
-                    <ul style="list-style-type: none; padding-left: 14px; margin: 0;">
-                        <li style="margin-bottom: 6px;"><b>Most Amount Sent To:</b> {most_sent_to}<br>₹{most_sent_amt:,.2f}</li>
-                        <li style="margin-bottom: 6px;"><b>Most Spent Day:</b> {most_spent_day}<br>₹{most_spent_day_amt:,.2f}</li>
-                        <li style="margin-bottom: 6px;"><b>Average Daily Spend:</b> ₹{avg_daily:,.2f}</li>
-                        <li style="margin-bottom: 6px;"><b>Average Weekly Spend:</b> ₹{avg_weekly:,.2f}</li>
-                        <li><b>Average Monthly Spend:</b> ₹{avg_monthly:,.2f}</li>
-                    </ul>
-                </div>
-                """
-
-                chart_html = fig.to_html(include_plotlyjs='cdn', full_html=False)
-                full_html = f"<html><body>{stats_html}{chart_html}</body></html>"
-
-                webview = QWebEngineView()
-                webview.setHtml(full_html)
-
-                chart_widget = QWidget()
-                layout = QVBoxLayout()
-                layout.addWidget(webview)
-                chart_widget.setLayout(layout)
-
-                self.tabs.addTab(chart_widget, "Summary")
+            # The chart stack is only loaded when a summary tab is shown.
+            from PyQt6.QtCore import QUrl
+            from PyQt6.QtWebEngineWidgets import QWebEngineView
+            from dashboard import dashboard_html, plotly_js_dir, summary_for
+
+            data = self.dashboard or summary_for(self.all_path, grouped_path)
+            # plotly.js is loaded from a local copy, so the charts work offline.
+            webview = QWebEngineView()
+            webview.setHtml(dashboard_html(data), QUrl.fromLocalFile(plotly_js_dir() + os.sep))
+
+            chart_widget = QWidget()
+            layout = QVBoxLayout()
+            layout.addWidget(webview)
+            chart_widget.setLayout(layout)
+
+            self.tabs.addTab(chart_widget, "Summary")
 
         except Exception as e:
             print("Error creating summary chart:", e)
+
+
+if __name__ == '__main__':
+    # Open converted files (CSV, Arrow or Parquet) without converting again:
+    # python TransactionViewer.py statement.arrow [grouped.csv] [cashew.csv]
+    import sys
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication(sys.argv)
+    viewer = TransactionViewer(*sys.argv[1:4])
+    viewer.show()
+    sys.exit(app.exec())
@@ -0,0 +1,57 @@
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must never be imported just by importing the conversion core.
+HEAVY_MODULES = ("PyQt6", "plotly", "pandas", "numpy", "fitz", "pymupdf")
+
+
+def measure(module, runs=5):
+    # Returns (best cumulative import time in microseconds, imported modules)
+    # from `python -X importtime`, which reports one line per import to stderr:
+    #   import time: self [us] | cumulative | imported package
+    best = None
+    imported = set()
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if not cumulative.strip().isdigit():
+                continue
+            imported.add(name.strip().split(".")[0])
+            if name.strip() == module:
+                cumulative = int(cumulative)
+                best = cumulative if best is None else min(best, cumulative)
+    return best, imported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the import cost of the conversion core.")
+    parser.add_argument("modules", nargs="*", default=["phonepe_statement", "cashew_csv_export"])
+    parser.add_argument("--budget-ms", type=float, default=60.0, help="maximum cumulative import time per module")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        micros, imported = measure(module, args.runs)
+        heavy = sorted(m for m in imported if m in HEAVY_MODULES)
+        ok = micros is not None and micros / 1000 <= args.budget_ms and not heavy
+        failed |= not ok
+        status = "OK  " if ok else "FAIL"
+        took = f"{micros / 1000:.1f} ms" if micros is not None else "n/a"
+        print(f"{status} {module}: {took} (budget {args.budget_ms:.0f} ms)"
+              + (f", imports {', '.join(heavy)}" if heavy else ""))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
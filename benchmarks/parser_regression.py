@@ -0,0 +1,292 @@
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+from benchmarks.parser_throughput import records_per_second
+from benchmarks.synthetic import MONTH_NAMES, PAYEES, make_records
+from phonepe_statement import (START_OF_RECORD_MARKER, RecordParser, fast_record_v1, fast_record_v2,
+                               parse_transactions, try_all_parsers)
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+GOLDEN_FILE = os.path.join(CORPUS_DIR, "records.json")
+FLOOR_FILE = os.path.join(CORPUS_DIR, "throughput_floor.json")
+
+# Where the payee and amount are in each layout's record lines.
+PAYEE_LINE = {"v1": 4, "v2": 2}
+AMOUNT_LINE = {"v1": 3, "v2": 8}
+NAME_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789      .,&'-/()₹éÜ—"
+FOOTER_LINES = ["Page 2 of 9", "This is a system generated statement.", "Transaction Statement for 98XXXXXX10",
+                "Date Transaction Details Type Amount", ""]
+
+
+def fields(txn):
+    # Everything a parsed transaction carries, comparable with ==.
+    if txn is None:
+        return None
+    return txn.timestamp, txn.payee, txn.txn_id, txn.utr_no, txn.payer, str(txn.kind), txn.paise
+
+
+def reference_transactions(text):
+    # parse_transactions as first written: split the whole statement on
+    # record markers and try every parser on every record. The streaming
+    # path must find the same transactions in the same order.
+    txns = []
+    rec = []
+    for l in text.strip().split('\n'):
+        if START_OF_RECORD_MARKER.match(l):
+            if rec:
+                txns.append(try_all_parsers(rec))
+            rec = [l]
+        else:
+            rec.append(l)
+    if rec:
+        txns.append(try_all_parsers(rec))
+    return [txn for txn in txns if txn]
+
+
+def warmed_parser(layout):
+    # A RecordParser that has detected layout and dispatches to its fast parser.
+    parser = RecordParser()
+    for rec in make_records(RecordParser.DETECT_RECORDS, layout):
+        parser(rec)
+    return parser
+
+
+def load_golden(path=GOLDEN_FILE):
+    with open(path, encoding='utf-8') as fo:
+        return json.load(fo)
+
+
+def check_golden(cases):
+    # Each record must give the expected CSV row (or nothing) from the
+    # reference parsers, from RecordParser before and after layout
+    # detection, and from the fast parsers whenever they accept it.
+    failures = []
+    parsers = {"RecordParser": RecordParser(), "RecordParser(v1)": warmed_parser("v1"),
+               "RecordParser(v2)": warmed_parser("v2"), "try_all_parsers": try_all_parsers}
+    for case in cases:
+        expected = case["expected"]
+        for name, parse in parsers.items():
+            txn = parse(case["lines"])
+            row = txn.to_row() if txn else None
+            if row != expected:
+                failures.append(f"{case['name']}: {name} gave {row}, expected {expected}")
+        for fast in (fast_record_v1, fast_record_v2):
+            txn = fast(case["lines"])
+            if txn is not None and txn.to_row() != expected:
+                failures.append(f"{case['name']}: {fast.__name__} gave {txn.to_row()}, expected {expected}")
+    return failures
+
+
+def update_golden(data, path=GOLDEN_FILE):
+    # Rewrites the expected rows from the reference parsers; returns the
+    # names of the cases that changed.
+    changed = []
+    for case in data["records"]:
+        txn = try_all_parsers(case["lines"])
+        expected = txn.to_row() if txn else None
+        if expected != case["expected"]:
+            changed.append(case["name"])
+            case["expected"] = expected
+    with open(path, 'w', encoding='utf-8') as fo:
+        json.dump(data, fo, ensure_ascii=False, indent=1)
+        fo.write("\n")
+    return changed
+
+
+def random_name(rng):
+    return "".join(rng.choice(NAME_CHARS) for _ in range(rng.randint(1, 32)))
+
+
+def random_amount(rng, layout):
+    whole = rng.choice([0, rng.randint(1, 999), rng.randint(1000, 10 ** 9)])
+    text = rng.choice([f"{whole:,}", str(whole), f"{whole:,}".replace(",", "", 1)])
+    decimals = rng.choice([0, 1, 2, 2, 2, 3])
+    if decimals:
+        text += "." + "".join(rng.choice("0123456789") for _ in range(decimals))
+    if rng.random() < 0.05:
+        text = rng.choice(["N/A", "—", "", "1..5", "1,2.3.4", "₹"])
+    if layout == "v1":
+        return rng.choice(["₹", "₹", "₹ ", "  ₹", ""]) + text
+    return rng.choice(["", "", " ", "INR "]) + text
+
+
+def fuzz_record(rng, layout):
+    # A synthetic record with a few random mutations: payees with commas,
+    # digits and non-ASCII, amounts in any format, details wrapped over
+    # several lines, odd dates and times, unknown kinds, footer lines and
+    # missing lines.
+    rec = next(make_records(1, layout, seed=rng.randrange(2 ** 32), start_year=rng.randint(2016, 2030)))
+    if rng.random() < 0.5:
+        prefix = rng.choice([p for p, _, _ in PAYEES] + ["Sent to", "Paid", ""])
+        rec[PAYEE_LINE[layout]] = f"{prefix} {random_name(rng)}"
+    if rng.random() < 0.5:
+        rec[AMOUNT_LINE[layout]] = random_amount(rng, layout)
+    if rng.random() < 0.1:
+        month = rng.choice(MONTH_NAMES + ["Foo", "mar", "MAR"])
+        rec[0] = f"{month} {rng.randint(0, 32):02d}, {rng.randint(2000, 2099)}"
+    if rng.random() < 0.1:
+        rec[1] = rng.choice([f"{rng.randint(0, 13):02d}:{rng.randint(0, 61):02d} {rng.choice(['AM', 'PM'])}",
+                             f"{rng.randint(1, 9)}:{rng.randint(0, 59):02d} AM", "09:15 am", "09:15"])
+    if rng.random() < 0.05:
+        rec[2 if layout == "v1" else 6] = rng.choice(["REVERSAL", "PENDING", "debit", ""])
+    if rng.random() < 0.15:
+        # wrap a details line, as plain-text extraction does with long payees
+        i = rng.randrange(2, len(rec))
+        words = rec[i].split(" ")
+        if len(words) > 1:
+            cut = rng.randrange(1, len(words))
+            rec[i:i + 1] = [" ".join(words[:cut]), " ".join(words[cut:])]
+    if rng.random() < 0.05:
+        del rec[rng.randrange(2, len(rec))]
+    if rng.random() < 0.1:
+        rec += rng.sample(FOOTER_LINES, rng.randint(1, 3))
+    return rec
+
+
+def fuzz_records(rng, n):
+    # Every parser must agree with try_all_parsers record by record.
+    failures = []
+    parsers = {"RecordParser": RecordParser(), "RecordParser(v1)": warmed_parser("v1"),
+               "RecordParser(v2)": warmed_parser("v2")}
+    for i in range(n):
+        rec = fuzz_record(rng, rng.choice(("v1", "v2")))
+        expected = fields(try_all_parsers(rec))
+        for name, parse in parsers.items():
+            got = fields(parse(rec))
+            if got != expected:
+                failures.append(f"record {rec!r}: {name} gave {got}, expected {expected}")
+        for fast in (fast_record_v1, fast_record_v2):
+            got = fields(fast(rec))
+            if got is not None and got != expected:
+                failures.append(f"record {rec!r}: {fast.__name__} gave {got}, expected {expected}")
+    return failures
+
+
+def fuzz_statement(rng, records):
+    lines = rng.sample(FOOTER_LINES, rng.randint(0, 3))
+    layout = rng.choice(("v1", "v2"))
+    for _ in range(records):
+        lines += fuzz_record(rng, layout)
+        if rng.random() < 0.1:
+            lines += rng.sample(FOOTER_LINES, rng.randint(1, 3))
+    return rng.choice(["", "\n", "  "]) + "\n".join(lines) + rng.choice(["", "\n", "\n\n ", " "])
+
+
+def fuzz_statements(rng, n, records=40):
+    # The streaming parser, fed the statement as pages cut at random points
+    # (mid-line included), must match the reference over the whole text.
+    failures = []
+    for _ in range(n):
+        text = fuzz_statement(rng, rng.randint(0, records))
+        expected = [fields(txn) for txn in reference_transactions(text)]
+        cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(0, 12))))
+        pages = [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+        for name, source in (("text", text), (f"{len(pages)} pages", pages)):
+            got = [fields(txn) for txn in parse_transactions(source)]
+            if got != expected:
+                failures.append(f"statement {text!r} as {name}: {len(got)} transactions, "
+                                f"expected {len(expected)}")
+    return failures
+
+
+def measure_throughput(n, repeat):
+    # The two parsers are timed alternately (best of repeat each, without
+    # GC pauses), so a busy machine slows both alike and the speedup holds.
+    results = {}
+    for layout in ("v1", "v2"):
+        records = list(make_records(n, layout))
+        generic = fast = 0
+        gc.disable()
+        try:
+            for _ in range(repeat):
+                generic = max(generic, records_per_second(try_all_parsers, records, 1))
+                fast = max(fast, records_per_second(RecordParser(), records, 1))
+        finally:
+            gc.enable()
+        results[layout] = {"records_per_sec": round(fast), "speedup": round(fast / generic, 2)}
+    return results
+
+
+def compare_floor(results, floor, tolerance, absolute=False):
+    # The speedup over try_all_parsers, measured in the same run, holds on
+    # any machine. records_per_sec only means something on the machine the
+    # floor was recorded on, so it is checked only when asked for.
+    keys = ("speedup", "records_per_sec") if absolute else ("speedup",)
+    regressions = []
+    for layout, result in results.items():
+        old = floor.get("results", {}).get(layout)
+        if not old:
+            continue
+        for key in keys:
+            if result[key] < old[key] * (1 - tolerance):
+                regressions.append(f"{layout} {key}: {result[key]:,} vs floor {old[key]:,}")
+    return regressions
+
+
+def report(label, failures, limit=10):
+    for line in failures[:limit]:
+        print(f"MISMATCH {line}")
+    if len(failures) > limit:
+        print(f"... and {len(failures) - limit} more")
+    print(f"{label}: {'OK' if not failures else f'{len(failures)} mismatches'}")
+    return bool(failures)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Check the record parsers against the golden corpus, the reference parsers on fuzzed "
+                    "records and statements, and the recorded throughput floor."
+    )
+    parser.add_argument("--records", type=int, default=20000, help="fuzzed records (default: 20000)")
+    parser.add_argument("--statements", type=int, default=500, help="fuzzed statements (default: 500)")
+    parser.add_argument("--seed", type=int, default=None, help="fuzz seed (default: random, printed)")
+    parser.add_argument("-n", "--throughput-records", type=int, default=50000,
+                        help="records per layout for the throughput check; 0 skips it")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed drop below the floor (default: 0.2)")
+    parser.add_argument("--record-floor", action="store_true", help="save the measured throughput as the new floor")
+    parser.add_argument("--absolute-floor", action="store_true",
+                        help="also require the floor's records/sec (only meaningful on the machine it was recorded on)")
+    parser.add_argument("--update-golden", action="store_true",
+                        help="rewrite the corpus' expected rows from the reference parsers")
+    args = parser.parse_args(argv)
+
+    golden = load_golden()
+    if args.update_golden:
+        changed = update_golden(golden)
+        print(f"Updated {len(changed)} cases: {', '.join(changed)}" if changed else "Corpus unchanged.")
+        return 0
+
+    seed = random.randrange(2 ** 32) if args.seed is None else args.seed
+    rng = random.Random(seed)
+    print(f"Fuzz seed {seed}")
+    failed = report(f"golden corpus, {len(golden['records'])} records", check_golden(golden["records"]))
+    failed |= report(f"fuzzed records, {args.records}", fuzz_records(rng, args.records))
+    failed |= report(f"fuzzed statements, {args.statements}", fuzz_statements(rng, args.statements))
+
+    if args.throughput_records:
+        results = measure_throughput(args.throughput_records, args.repeat)
+        for layout, result in results.items():
+            print(f"{layout}: RecordParser {result['records_per_sec']:,} rec/s "
+                  f"({result['speedup']:.1f}x try_all_parsers)")
+        if args.record_floor:
+            with open(FLOOR_FILE, 'w', encoding='utf-8') as fo:
+                json.dump({"records": args.throughput_records, "results": results}, fo, indent=2)
+                fo.write("\n")
+            print(f"Floor saved to {FLOOR_FILE}")
+        elif os.path.exists(FLOOR_FILE):
+            with open(FLOOR_FILE, encoding='utf-8') as fo:
+                regressions = compare_floor(results, json.load(fo), args.tolerance, args.absolute_floor)
+            for line in regressions:
+                print(f"REGRESSION {line}")
+            failed |= bool(regressions)
+            if not regressions:
+                print("Throughput at or above the floor.")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
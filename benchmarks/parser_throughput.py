@@ -0,0 +1,35 @@
+import argparse
+import sys
+import time
+from benchmarks.synthetic import make_records
+from phonepe_statement import RecordParser, try_all_parsers
+
+
+def records_per_second(parse, records, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for rec in records:
+            parse(rec)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(records) / best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare record parser throughput.")
+    parser.add_argument("-n", "--records", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    for layout in ("v1", "v2"):
+        records = list(make_records(args.records, layout))
+        generic = records_per_second(try_all_parsers, records, args.repeat)
+        fast = records_per_second(RecordParser(), records, args.repeat)
+        print(f"{layout}: try_all_parsers {generic:,.0f} rec/s, RecordParser {fast:,.0f} rec/s "
+              f"({fast / generic:.1f}x)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from benchmarks.synthetic import make_statement_pdf
+from cashew_csv_export import export_for_cashew
+from fused_writer import write_outputs
+from phonepe_statement import extract_text_from_pdf, parse_transactions, write_csv, write_grouped_csv
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGES = ("extract_text_from_pdf", "parse_transactions", "write_csv", "write_grouped_csv", "export_for_cashew",
+          "write_outputs")
+
+
+def peak_rss_mb():
+    # High-water mark of the whole process so far, not of any one stage.
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def traced_peak_mb(func):
+    # Peak of the Python allocations made while func runs; memory held by
+    # earlier stages isn't counted, nor is PyMuPDF's own (C) memory. Run
+    # apart from the timed repeats, since tracing slows allocation down.
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run_layout(n, layout, password, work_dir, repeat):
+    pdf_path = os.path.join(work_dir, f"statement_{layout}_{n}.pdf")
+    if not os.path.exists(pdf_path):
+        make_statement_pdf(pdf_path, n, layout, password=password)
+
+    # Each stage feeds the next; the best of `repeat` runs is reported.
+    stages = {
+        "extract_text_from_pdf": lambda: extract_text_from_pdf(pdf_path, password),
+        "parse_transactions": lambda: list(parse_transactions(text)),
+        "write_csv": lambda: write_csv(txns, os.path.join(work_dir, "plain.csv")),
+        "write_grouped_csv": lambda: write_grouped_csv(txns, os.path.join(work_dir, "grouped.csv")),
+        "export_for_cashew": lambda: export_for_cashew(txns, work_dir, filename="cashew.csv"),
+        # all three of the above in one pass
+        "write_outputs": lambda: write_outputs(txns, os.path.join(work_dir, "plain.csv"),
+                                               os.path.join(work_dir, "grouped.csv"),
+                                               os.path.join(work_dir, "cashew.csv")),
+    }
+    results = {}
+    text = txns = None
+    for stage in STAGES:
+        best = None
+        for _ in range(repeat):
+            value, seconds = timed(stages[stage])
+            best = seconds if best is None else min(best, seconds)
+        if stage == "extract_text_from_pdf":
+            text = value
+        elif stage == "parse_transactions":
+            txns = value
+            if len(txns) != n:
+                raise RuntimeError(f"{layout}: parsed {len(txns)} of {n} transactions")
+        results[stage] = {"seconds": round(best, 4), "per_sec": round(n / best),
+                          "peak_alloc_mb": round(traced_peak_mb(stages[stage]), 1)}
+    return results
+
+
+def compare(results, baseline, tolerance):
+    # Throughput (not time) is compared, so baselines taken at another size
+    # remain roughly meaningful.
+    regressions = []
+    for layout, stages in results.items():
+        for stage, result in stages.items():
+            old = baseline.get("results", {}).get(layout, {}).get(stage)
+            if old and result["per_sec"] < old["per_sec"] * (1 - tolerance):
+                regressions.append(f"{layout} {stage}: {result['per_sec']:,} txn/s "
+                                   f"vs baseline {old['per_sec']:,} txn/s")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time each stage of the conversion pipeline on synthetic statements.")
+    parser.add_argument("-n", "--transactions", type=int, default=10000, help="transactions per statement")
+    parser.add_argument("--layouts", default="v1,v2", help="comma-separated layouts: v1, v2")
+    parser.add_argument("--password", help="encrypt the generated PDFs with this password")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--work-dir", help="keep generated PDFs and outputs here (reused between runs)")
+    parser.add_argument("--json", help="write the results to this file (use it as a later --baseline)")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed throughput drop (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="phonepe-bench-")
+    os.makedirs(work_dir, exist_ok=True)
+    results = {}
+    try:
+        for layout in args.layouts.split(","):
+            results[layout] = run_layout(args.transactions, layout, args.password, work_dir, args.repeat)
+            for stage in STAGES:
+                r = results[layout][stage]
+                print(f"{layout} {stage:22} {r['seconds']:8.3f}s {r['per_sec']:>12,} txn/s  "
+                      f"peak alloc {r['peak_alloc_mb']:.1f} MB")
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    peak = peak_rss_mb()
+    print(f"Process peak RSS (all layouts and stages): {'n/a' if peak is None else f'{peak:.0f} MB'}")
+    report = {"transactions": args.transactions, "encrypted": bool(args.password), "results": results,
+              "process_peak_rss_mb": peak}
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fo:
+            json.dump(report, fo, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as fo:
+            regressions = compare(results, json.load(fo), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import random
+
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+PAYEES = [
+    ("Paid to", "DEBIT", ["SWIGGY", "Zomato Ltd", "AMAZON PAY", "BESCOM", "Reliance Jio", "Uber India", "IRCTC"]),
+    ("Payment to", "DEBIT", ["HDFC Credit Card", "LIC of India"]),
+    ("Received from", "CREDIT", ["RAHUL KUMAR", "ACME PAYROLL", "PRIYA S"]),
+    ("Refund from", "CREDIT", ["Flipkart", "Myntra"]),
+]
+
+
+def make_records(n, layout="v2", seed=0, start_year=2023):
+    # Yields n statement records (lists of lines) in the layout handled by
+    # mk_record_v1 or mk_record_v2, in chronological order.
+    rng = random.Random(seed)
+    day_of_year = 0
+    for i in range(n):
+        if rng.random() < 0.1:
+            day_of_year += 1
+        year = start_year + day_of_year // 336
+        month = (day_of_year % 336) // 28
+        day = day_of_year % 28 + 1
+        date = f"{MONTH_NAMES[month]} {day:02d}, {year}"
+        time = f"{rng.randint(1, 12):02d}:{rng.randint(0, 59):02d} {rng.choice(['AM', 'PM'])}"
+
+        prefix, kind, names = rng.choice(PAYEES)
+        payee = f"{prefix} {rng.choice(names)}"
+        amount = f"{rng.randint(1, 250000):,}.{rng.randint(0, 99):02d}"
+        txn_id = f"T{rng.randrange(10 ** 20, 10 ** 21)}"
+        utr_no = str(rng.randrange(10 ** 11, 10 ** 12))
+        account = f"XXXXXX{rng.randint(1000, 9999)}"
+
+        if layout == "v1":
+            yield [date, time, kind, "₹" + amount, payee, f"Transaction ID : {txn_id}",
+                   f"UTR No : {utr_no}", "Debited from" if kind == "DEBIT" else "Credited to", account]
+        else:
+            yield [date, time, payee, f"Transaction ID {txn_id}", f"UTR No. {utr_no}",
+                   ("Paid by " if kind == "DEBIT" else "Credited to ") + account, kind, "INR", amount]
+
+
+def make_statement_text(n, layout="v2", seed=0):
+    header = ["Transaction Statement for 98XXXXXX10", "Date Transaction Details Type Amount"]
+    lines = header + [line for rec in make_records(n, layout, seed) for line in rec]
+    return "\n".join(lines) + "\n"
+
+
+def make_statement_pdf(path, n, layout="v2", seed=0, password=None, lines_per_page=60):
+    # Writes a synthetic statement PDF, AES-256 encrypted when a password is
+    # given. The base-14 fonts have no rupee glyph, so v1 amounts are written
+    # without it (the parser accepts bare amounts as well).
+    import fitz
+    lines = make_statement_text(n, layout, seed).replace("₹", "").splitlines()
+    doc = fitz.open()
+    for i in range(0, len(lines), lines_per_page):
+        page = doc.new_page()
+        page.insert_text((40, 40), "\n".join(lines[i:i + lines_per_page]), fontsize=8, fontname="helv")
+    options = {}
+    if password:
+        options = dict(encryption=fitz.PDF_ENCRYPT_AES_256, user_pw=password, owner_pw=password)
+    doc.save(path, garbage=1, deflate=True, **options)
+    doc.close()
+    return path
+
+
+# Column x positions of the statement table (Date, Transaction Details, Type,
+# Amount), and which record lines go in each column for either layout.
+TABLE_COLUMNS = {"Date": 40, "Transaction Details": 130, "Type": 400, "Amount": 470}
+TABLE_CELLS = {
+    "v1": (("Date", (0, 1)), ("Type", (2,)), ("Amount", (3,)), ("Transaction Details", (4, 5, 6, 7, 8))),
+    "v2": (("Date", (0, 1)), ("Transaction Details", (2, 3, 4, 5)), ("Type", (6,)), ("Amount", (7, 8))),
+}
+
+
+def make_statement_table_pdf(path, n, layout="v2", seed=0, password=None, rows_per_page=10, wrap_payees=0.0):
+    # Like make_statement_pdf, but records are laid out in table columns under
+    # a header row, as in real statements. A wrap_payees fraction of payees is
+    # wrapped onto two lines, which shifts the fields of those records in
+    # plain-text extraction.
+    import fitz
+    rng = random.Random(seed + 1)
+    payee_line = 4 if layout == "v1" else 2
+    doc = fitz.open()
+    page = None
+    for i, rec in enumerate(make_records(n, layout, seed)):
+        if i % rows_per_page == 0:
+            page = doc.new_page()
+            page.insert_text((40, 40), "Transaction Statement for 98XXXXXX10", fontsize=10, fontname="helv")
+            for name, x in TABLE_COLUMNS.items():
+                page.insert_text((x, 70), name, fontsize=9, fontname="helv")
+            y = 95
+        lines = [line.replace("₹", "") for line in rec]
+        payee = lines[payee_line]
+        if rng.random() < wrap_payees and " " in payee:
+            cut = payee.rindex(" ", 0, max(payee.index(" ") + 1, len(payee) // 2 + 1))
+            lines[payee_line] = (payee[:cut], payee[cut + 1:])
+        height = 0
+        for column, indexes in TABLE_CELLS[layout]:
+            cell = []
+            for index in indexes:
+                cell += lines[index] if isinstance(lines[index], tuple) else [lines[index]]
+            for row, text in enumerate(cell):
+                page.insert_text((TABLE_COLUMNS[column], y + row * 11), text, fontsize=8, fontname="helv")
+            height = max(height, len(cell))
+        y += height * 11 + 12
+    options = {}
+    if password:
+        options = dict(encryption=fitz.PDF_ENCRYPT_AES_256, user_pw=password, owner_pw=password)
+    doc.save(path, garbage=1, deflate=True, **options)
+    doc.close()
+    return path
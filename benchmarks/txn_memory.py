@@ -0,0 +1,47 @@
+import argparse
+import sys
+import tracemalloc
+from benchmarks.synthetic import make_records
+from phonepe_statement import RecordParser
+
+
+class StringTxn:
+    # The previous dict-backed record with formatted string fields, kept
+    # here only as a point of comparison.
+    def __init__(self, date, time, payee, txn_id, utr_no, payer, kind, amount):
+        self.date = date
+        self.time = time
+        self.payee = payee
+        self.txn_id = txn_id
+        self.utr_no = utr_no
+        self.payer = payer
+        self.kind = kind
+        self.amount = amount
+
+
+def bytes_per_txn(build, n):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    txns = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del txns
+    return (after - before) / n
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure memory per parsed transaction.")
+    parser.add_argument("-n", "--records", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    records = list(make_records(args.records, "v2"))
+    parse = RecordParser()
+    compact = bytes_per_txn(lambda: [parse(r) for r in records], args.records)
+    strings = bytes_per_txn(
+        lambda: [StringTxn(*[str(v) for v in parse(r).to_row()]) for r in records], args.records)
+    print(f"PhonePeTxn: {compact:.0f} bytes/txn, string-field record: {strings:.0f} bytes/txn")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,38 +1,68 @@
 import csv
 import datetime
+import itertools
 import os
+from functools import lru_cache
 
-def export_for_cashew(txns, output_dir, payee_category_map=None):
-    payee_category_map = payee_category_map or {}
+@lru_cache(maxsize=65536)
+def _format_day(day):
+    return (datetime.date(1970, 1, 1) + datetime.timedelta(days=day)).strftime("%d-%m-%Y")
+
+def format_cashew_date(timestamp):
+    day, seconds = divmod(timestamp, 86400)
+    return f"{_format_day(day)} {seconds // 3600:02d}:{seconds // 60 % 60:02d}"
+
+CASHEW_HEADER = ["Date", "Amount", "Category", "Title", "Note", "Account"]
+
+def default_cashew_filename():
     now = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    filename = f"cashew-{now}.csv"
-    filepath = os.path.join(output_dir, filename)
+    return f"cashew-{now}.csv"
 
-    # Try detecting if extended fields are present (assuming attributes are set externally)
-    has_category = hasattr(txns[0], 'category') if txns else False
-    has_note = hasattr(txns[0], 'note') if txns else False
+def peek_extended_fields(txns):
+    # Try detecting if extended fields are present (assuming attributes are set externally).
+    # txns may be a one-shot iterator, so peek at the first one and put it back.
+    # Returns (txns, has_category, has_note).
+    txns = iter(txns)
+    first = next(txns, None)
+    if first is None:
+        return txns, False, False
+    return itertools.chain([first], txns), hasattr(first, 'category'), hasattr(first, 'note')
 
-    with open(filepath, 'w', newline='', encoding='utf-8') as fo:
-        writer = csv.writer(fo)
-        writer.writerow(["Date", "Amount", "Category", "Title", "Note", "Account"])
+def make_cashew_row(payee_category_map=None, rules=None, has_category=False, has_note=False):
+    # Returns a function turning one transaction into a Cashew CSV row.
+    payee_category_map = payee_category_map or {}
+
+    def cashew_row(txn):
+        formatted_date = format_cashew_date(txn.timestamp)
+
+        amount = txn.paise / 100
+        amount = -amount if txn.kind == "DEBIT" else amount
 
-        for txn in txns:
-            dt = datetime.datetime.strptime(txn.date + " " + txn.time, "%Y-%m-%d %I:%M %p")
-            formatted_date = dt.strftime("%d-%m-%Y %H:%M")
+        # Use user category mapping if available, then the category rules,
+        # else txn.category attr if present, else empty
+        category = ""
+        if txn.payee in payee_category_map:
+            category = payee_category_map[txn.payee]
+        elif rules is not None and rules.categorize(txn.payee) is not None:
+            category = rules.categorize(txn.payee)
+        elif has_category:
+            category = getattr(txn, 'category', "")
+        note = getattr(txn, 'note', "") if has_note else ""
 
-            amount = float(txn.amount.replace("₹", ""))
-            amount = -amount if txn.kind == "DEBIT" else amount
+        title = txn.payee or ("Received" if txn.kind == "CREDIT" else "Paid")
 
-            # Use user category mapping if available, else txn.category attr if present, else empty
-            category = ""
-            if txn.payee in payee_category_map:
-                category = payee_category_map[txn.payee]
-            elif has_category:
-                category = getattr(txn, 'category', "")
-            note = getattr(txn, 'note', "") if has_note else ""
+        return [formatted_date, amount, category, title, note, ""]
 
-            title = txn.payee or ("Received" if txn.kind == "CREDIT" else "Paid")
+    return cashew_row
 
-            writer.writerow([formatted_date, amount, category, title, note, ""])
+def export_for_cashew(txns, output_dir, payee_category_map=None, filename=None, rules=None):
+    filepath = os.path.join(output_dir, filename or default_cashew_filename())
+    txns, has_category, has_note = peek_extended_fields(txns)
+    cashew_row = make_cashew_row(payee_category_map, rules, has_category, has_note)
+
+    with open(filepath, 'w', newline='', encoding='utf-8') as fo:
+        writer = csv.writer(fo)
+        writer.writerow(CASHEW_HEADER)
+        writer.writerows(map(cashew_row, txns))
 
     return filepath
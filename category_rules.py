@@ -0,0 +1,219 @@
+import json
+import os
+import re
+
+RULE_TYPES = ("exact", "prefix", "contains", "regex")
+REGEX_FLAGS = re.IGNORECASE | re.DOTALL
+# Backreferences and conditionals refer to groups by number or name, which
+# no longer line up once the pattern is one alternative of a larger regex.
+GROUP_REFERENCE = re.compile(r"(?<!\\)(?:\\\\)*(?:\\[1-9]|\\g<|\(\?P=|\(\?\()")
+
+
+def default_rules_path():
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.environ.get("PHONEPE_RULES_FILE") or os.path.join(app_dir, "category_rules.json")
+
+
+def parse_pattern(pattern):
+    # Shorthand used by the rules file and the GUI dialog:
+    #   "Paid to SWIGGY*" -> prefix, "*swiggy*" -> contains,
+    #   "re:^Paid to (SWIGGY|ZOMATO)" -> regex, anything else -> exact.
+    if pattern.startswith("re:"):
+        return "regex", pattern[3:]
+    if len(pattern) > 2 and pattern.startswith("*") and pattern.endswith("*"):
+        return "contains", pattern[1:-1]
+    if len(pattern) > 1 and pattern.endswith("*"):
+        return "prefix", pattern[:-1]
+    return "exact", pattern
+
+
+def regex_alternative(pattern, index):
+    # Each regex is a lookahead alternative anchored at the start, so
+    # alternatives are tried in rule order and the first one matching
+    # anywhere in the payee wins.
+    return f"(?P<r{index}>(?=.*?(?:{pattern})))"
+
+
+def combinable(pattern):
+    # Whether a regex rule can go into the combined regex. Rules with inline
+    # global flags, named groups or group references are matched on their own.
+    if GROUP_REFERENCE.search(pattern):
+        return False
+    try:
+        return not re.compile(pattern).groupindex and bool(re.compile(regex_alternative(pattern, 0)))
+    except re.error:
+        return False
+
+
+def contains_automaton(patterns):
+    # Aho-Corasick automaton over [(folded pattern, (order, category))]:
+    # returns (goto, fail, out) indexed by state, 0 being the root. out holds
+    # the first rule in file order ending at that state, its own or reached
+    # through failure links, so one pass over a payee finds the first
+    # matching contains rule.
+    goto, fail, out = [{}], [0], [None]
+    for pattern, found in patterns:
+        state = 0
+        for ch in pattern:
+            if ch not in goto[state]:
+                goto.append({})
+                fail.append(0)
+                out.append(None)
+                goto[state][ch] = len(goto) - 1
+            state = goto[state][ch]
+        if out[state] is None or found < out[state]:
+            out[state] = found
+    queue = list(goto[0].values())
+    for state in queue:  # breadth first, so a failure target is done first
+        for ch, child in goto[state].items():
+            target = fail[state]
+            while target and ch not in goto[target]:
+                target = fail[target]
+            fail[child] = goto[target].get(ch, 0)
+            inherited = out[fail[child]]
+            if inherited is not None and (out[child] is None or inherited < out[child]):
+                out[child] = inherited
+            queue.append(child)
+    return goto, fail, out
+
+
+class CategoryRules:
+    # Payee -> category rules, matched case-insensitively with precedence
+    # exact > longest prefix > first matching contains/regex rule (file order).
+    # Exact, prefix and contains rules are compiled into a dict, a character
+    # trie and an Aho-Corasick automaton, each matched in one pass over the
+    # payee whatever the number of rules. Regex rules share one combined
+    # regex, but it still tries them in turn, and the few that can't be
+    # combined are searched one by one, so their cost grows with their
+    # number. What keeps large statements cheap is that results are memoized
+    # per payee, and statements repeat the same payees over and over.
+    def __init__(self, rules=()):
+        self.rules = []
+        self._matcher = None
+        for rule in rules:
+            self.add(rule["type"], rule["pattern"], rule["category"])
+
+    def add(self, kind, pattern, category):
+        if kind not in RULE_TYPES:
+            raise ValueError(f"Unknown rule type: {kind!r}")
+        if kind == "regex":
+            try:
+                re.compile(pattern, REGEX_FLAGS)
+            except re.error as e:
+                raise ValueError(f"Invalid regex rule {pattern!r}: {e}") from None
+        key = (kind, pattern if kind == "regex" else pattern.casefold())
+        for rule in self.rules:
+            if (rule["type"], rule["pattern"] if kind == "regex" else rule["pattern"].casefold()) == key:
+                rule["category"] = category
+                break
+        else:
+            self.rules.append({"type": kind, "pattern": pattern, "category": category})
+        self._matcher = None
+
+    def add_mappings(self, mappings):
+        # {pattern shorthand: category}, as entered in the GUI dialog.
+        for pattern, category in mappings.items():
+            kind, pattern = parse_pattern(pattern)
+            self.add(kind, pattern, category)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def _compile(self):
+        exact = {}
+        prefixes = {}
+        substrings = []
+        searches = []
+        categories = []
+        separate = []
+        for order, rule in enumerate(self.rules):
+            kind, pattern, category = rule["type"], rule["pattern"], rule["category"]
+            if kind == "exact":
+                exact.setdefault(pattern.casefold(), category)
+            elif kind == "prefix":
+                node = prefixes
+                for ch in pattern.casefold():
+                    node = node.setdefault(ch, {})
+                node.setdefault(None, category)
+            elif kind == "contains":
+                substrings.append((pattern.casefold(), (order, category)))
+            elif combinable(pattern):
+                searches.append(regex_alternative(pattern, len(categories)))
+                categories.append((order, category))
+            else:
+                separate.append((order, re.compile(pattern, REGEX_FLAGS), category))
+        combined = re.compile("|".join(searches), REGEX_FLAGS) if searches else None
+        substrings = contains_automaton(substrings) if substrings else None
+        self._matcher = (exact, prefixes, substrings, combined, categories, separate, {})
+        return self._matcher
+
+    def categorize(self, payee):
+        exact, prefixes, substrings, combined, categories, separate, cache = self._matcher or self._compile()
+        if payee in cache:
+            return cache[payee]
+        folded = payee.casefold()
+        category = exact.get(folded)
+        if category is None:
+            node = prefixes
+            for ch in folded:
+                node = node.get(ch)
+                if node is None:
+                    break
+                category = node.get(None, category)
+        if category is None:
+            # Contains and regex rules compete on file order.
+            best = None
+            if substrings is not None:
+                goto, fail, out = substrings
+                state = 0
+                for ch in folded:
+                    while state and ch not in goto[state]:
+                        state = fail[state]
+                    state = goto[state].get(ch, 0)
+                    found = out[state]
+                    if found is not None and (best is None or found < best):
+                        best = found
+            if combined is not None:
+                m = combined.match(payee)
+                if m:
+                    found = categories[int(m.lastgroup[1:])]
+                    if best is None or found < best:
+                        best = found
+            for order, regex, found in separate:
+                if best is not None and order > best[0]:
+                    break
+                if regex.search(payee):
+                    best = (order, found)
+                    break
+            if best is not None:
+                category = best[1]
+        cache[payee] = category
+        return category
+
+    def to_json(self):
+        return {"rules": self.rules}
+
+
+def load_rules(path=None):
+    # A missing rules file is just an empty rule set.
+    path = path or default_rules_path()
+    try:
+        with open(path, encoding='utf-8') as fo:
+            data = json.load(fo)
+    except FileNotFoundError:
+        return CategoryRules()
+    rules = CategoryRules()
+    for rule in data["rules"] if isinstance(data, dict) else data:
+        if "type" in rule:
+            rules.add(rule["type"], rule["pattern"], rule["category"])
+        else:
+            rules.add(*parse_pattern(rule["pattern"]), rule["category"])
+    return rules
+
+
+def save_rules(rules, path=None):
+    path = path or default_rules_path()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as fo:
+        json.dump(rules.to_json(), fo, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
@@ -0,0 +1,72 @@
+import os
+from array import array
+
+# Typed, columnar counterpart of the plain CSV. pyarrow is optional and only
+# imported here, when a columnar file is written or read.
+COLUMNAR_SUFFIXES = (".arrow", ".feather", ".parquet")
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise RuntimeError("Arrow/Parquet output needs pyarrow (pip install pyarrow).") from None
+    return pyarrow
+
+
+def is_columnar(path):
+    return path.lower().endswith(COLUMNAR_SUFFIXES)
+
+
+def transactions_table(txns):
+    # pyarrow Table with statement-local timestamps, exact decimal amounts,
+    # dictionary-encoded kind/payee/payer and UTR numbers without the tab.
+    pa = _pyarrow()
+    timestamps = array('q')
+    amounts = array('q')  # decimal128: unscaled paise, sign-extended to 128 bits
+    payees, txn_ids, utr_nos, payers, kinds = [], [], [], [], []
+    for txn in txns:
+        timestamps.append(txn.timestamp)
+        amounts.append(txn.paise)
+        amounts.append(-1 if txn.paise < 0 else 0)
+        payees.append(txn.payee)
+        txn_ids.append(txn.txn_id)
+        utr_nos.append(txn.utr_no.strip())
+        payers.append(txn.payer)
+        kinds.append(str(txn.kind))
+    count = len(timestamps)
+    return pa.table({
+        "timestamp": pa.array(timestamps, pa.int64()).cast(pa.timestamp("s")),
+        "payee": pa.array(payees, pa.string()).dictionary_encode(),
+        "txn_id": pa.array(txn_ids, pa.string()),
+        "utr_no": pa.array(utr_nos, pa.string()),
+        "payer": pa.array(payers, pa.string()).dictionary_encode(),
+        "kind": pa.array(kinds, pa.string()).dictionary_encode(),
+        "amount": pa.Array.from_buffers(pa.decimal128(18, 2), count, [None, pa.py_buffer(amounts)]),
+    })
+
+
+def write_columnar(txns, output_file):
+    # Arrow IPC (.arrow/.feather, uncompressed so it can be memory-mapped) or
+    # Parquet (.parquet), chosen by extension. Returns the row count.
+    table = transactions_table(txns)
+    if output_file.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+        pq.write_table(table, output_file)
+    else:
+        pa = _pyarrow()
+        tmp_file = output_file + ".tmp"
+        with pa.OSFile(tmp_file, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_file, output_file)
+    return table.num_rows
+
+
+def read_columnar(path):
+    # Arrow IPC files are memory-mapped, so columns are read lazily and
+    # without copying; Parquet has to be decoded.
+    pa = _pyarrow()
+    if path.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+        return pq.read_table(path)
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
@@ -0,0 +1,256 @@
+import argparse
+import csv
+import io
+import json
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from category_rules import load_rules
+from instrumentation import Stats
+from phonepe_cli import OUTPUTS, convert_file
+
+DEFAULT_PORT = 8765
+MAX_UPLOAD_BYTES = 64 * 1024 * 1024
+TIMEOUT_SECONDS = 120
+
+# Set in each worker by _warm_up.
+_rules = None
+
+
+def _warm_up(rules_path):
+    # Runs once per worker process, so requests don't pay for importing
+    # PyMuPDF or loading the category rules.
+    global _rules
+    import fitz  # noqa: F401
+    _rules = load_rules(rules_path)
+
+
+def _worker_pid(_):
+    return os.getpid()
+
+
+def _convert(data, password, outputs):
+    # Runs in a worker: converts the uploaded PDF in a scratch directory and
+    # returns (count, {output: CSV text}, {stage: seconds}, start time).
+    started = time.time()
+    stats = Stats()
+    with tempfile.TemporaryDirectory(prefix="phonepe-http-") as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, "statement.pdf")
+        with open(pdf_path, "wb") as fo:
+            fo.write(data)
+        with stats:
+            result = convert_file(pdf_path, tmp_dir, password, outputs, rules=_rules, stats=stats)
+        texts = {}
+        for name in outputs:
+            with open(result["files"][name], encoding="utf-8", newline="") as fo:
+                texts[name] = fo.read()
+    return result["count"], texts, dict(stats.seconds), started
+
+
+def csv_to_json(name, text):
+    # Plain and Cashew outputs become lists of objects keyed by the CSV
+    # header; the grouped summary becomes its groups plus the summary rows.
+    rows = list(csv.reader(io.StringIO(text)))
+    if name != "grouped":
+        return [dict(zip(rows[0], row)) for row in rows[1:]]
+    end = rows.index([]) if [] in rows else len(rows)
+    return {
+        "groups": [dict(zip(rows[0], row)) for row in rows[1:end]],
+        "summary": {row[0]: row[1:] for row in rows[end + 2:]},
+    }
+
+
+class ConversionServer(ThreadingHTTPServer):
+    # Each request is handled on its own thread and converted on a pool of
+    # worker processes started (and warmed up) before the first request. At
+    # most max_concurrent conversions are queued or running; further
+    # requests get 503 right away. A conversion that times out can't be
+    # cancelled, so the pool is replaced and its workers killed.
+    daemon_threads = True
+
+    def __init__(self, address, workers=None, max_concurrent=None, timeout=TIMEOUT_SECONDS, rules_path=None,
+                 max_upload=MAX_UPLOAD_BYTES):
+        self.pool = None
+        super().__init__(address, ConversionHandler)
+        self.workers = workers or os.cpu_count() or 1
+        self.max_concurrent = max_concurrent or self.workers * 2
+        self.slots = threading.BoundedSemaphore(self.max_concurrent)
+        self.busy = 0
+        self.busy_lock = threading.Lock()
+        self.timeout = timeout
+        self.max_upload = max_upload
+        self.rules_path = rules_path
+        self.pool_lock = threading.Lock()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up, initargs=(rules_path,))
+        self.warm_up()
+
+    def warm_up(self):
+        # Start every worker now instead of on the first requests.
+        self.worker_pids = sorted(set(self.pool.map(_worker_pid, range(self.workers))))
+
+    def server_close(self):
+        super().server_close()
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    def submit(self, data, password, outputs):
+        # Returns (pool, future), or None when max_concurrent conversions
+        # are already in progress. The slot is freed when the future is done,
+        # which for a timed-out conversion is when recycle() kills its pool.
+        if not self.slots.acquire(blocking=False):
+            return None
+        with self.busy_lock:
+            self.busy += 1
+        try:
+            pool = self.pool
+            future = pool.submit(_convert, data, password, outputs)
+        except Exception:
+            self.release()
+            raise
+        future.add_done_callback(lambda f: self.release())
+        return pool, future
+
+    def recycle(self, pool):
+        # Replaces pool after one of its conversions timed out; otherwise a
+        # hung PDF would hold its worker and slot for good. Killing the old
+        # workers fails their futures with BrokenProcessPool, so every slot
+        # they held is released.
+        with self.pool_lock:
+            if self.pool is not pool:
+                return  # another timed-out request already replaced it
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up,
+                                            initargs=(self.rules_path,))
+        # SIGKILL, since a worker stuck in PyMuPDF never runs a SIGTERM handler.
+        for process in list((pool._processes or {}).values()):
+            process.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+        self.warm_up()
+
+    def release(self):
+        with self.busy_lock:
+            self.busy -= 1
+        self.slots.release()
+
+
+class ConversionHandler(BaseHTTPRequestHandler):
+    # GET  /health
+    # POST /convert?outputs=plain,grouped,cashew&format=csv|json
+    #      body: the PDF; password in the X-PDF-Password header
+    server_version = "phonepe-converter/1"
+
+    def send_body(self, status, body, content_type, headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, data, headers=()):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_body(status, body, "application/json; charset=utf-8", headers)
+
+    def do_GET(self):
+        if urlsplit(self.path).path != "/health":
+            return self.send_json(404, {"error": "Not found."})
+        server = self.server
+        self.send_json(200, {"status": "ok", "workers": server.workers, "worker_pids": server.worker_pids,
+                             "busy": server.busy, "max_concurrent": server.max_concurrent})
+
+    def do_POST(self):
+        received = time.perf_counter()
+        url = urlsplit(self.path)
+        if url.path != "/convert":
+            return self.send_json(404, {"error": "Not found."})
+        query = parse_qs(url.query)
+        fmt = query.get("format", ["csv"])[0]
+        outputs = tuple(o.strip() for o in query.get("outputs", [",".join(OUTPUTS)])[0].split(",") if o.strip())
+        if fmt not in ("csv", "json"):
+            return self.send_json(400, {"error": "format must be csv or json."})
+        if not outputs or set(outputs) - set(OUTPUTS):
+            return self.send_json(400, {"error": f"outputs must be among {', '.join(OUTPUTS)}."})
+        if fmt == "csv" and len(outputs) != 1:
+            return self.send_json(400, {"error": "format=csv returns one output; pick it with outputs=..."})
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = 0
+        if length <= 0:
+            return self.send_json(411, {"error": "Send the PDF as the request body."})
+        if length > self.server.max_upload:
+            return self.send_json(413, {"error": "PDF too large."})
+        data = self.rfile.read(length)
+        password = self.headers.get("X-PDF-Password") or None
+
+        submitted = time.time()
+        job = self.server.submit(data, password, outputs)
+        if job is None:
+            return self.send_json(503, {"error": "Too many conversions in progress."}, [("Retry-After", "1")])
+        pool, future = job
+        try:
+            count, texts, seconds, started = future.result(timeout=self.server.timeout)
+        except TimeoutError:
+            self.send_json(504, {"error": "Conversion timed out."})
+            return self.server.recycle(pool)
+        except BrokenProcessPool:
+            # Its worker was killed because another conversion timed out.
+            return self.send_json(503, {"error": "Conversion interrupted; try again."}, [("Retry-After", "1")])
+        except Exception as e:
+            return self.send_json(422, {"error": str(e) or e.__class__.__name__})
+
+        # Server-Timing: time waiting for a worker, each conversion stage and
+        # the whole request, in milliseconds.
+        timings = [("queue", max(0.0, started - submitted))] + sorted(seconds.items())
+        timings.append(("total", time.perf_counter() - received))
+        headers = [("Server-Timing", ", ".join(f"{name};dur={sec * 1000:.1f}" for name, sec in timings)),
+                   ("X-Transaction-Count", str(count))]
+        if fmt == "json":
+            self.send_json(200, {"count": count, **{name: csv_to_json(name, texts[name]) for name in outputs}},
+                           headers)
+        else:
+            name = outputs[0]
+            headers.append(("Content-Disposition", f'attachment; filename="statement_{name}.csv"'))
+            self.send_body(200, texts[name].encode("utf-8"), "text/csv; charset=utf-8", headers)
+
+    def log_message(self, format, *args):
+        sys.stderr.write(f"{self.log_date_time_string()} {self.address_string()} {format % args}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="conversion_server",
+        description="Serve PhonePe statement conversion over HTTP on this machine."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT})")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-concurrent", type=int, default=None,
+                        help="conversions queued or running at once before 503 (default: 2 per worker)")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT_SECONDS, help="seconds before a request gets 504")
+    parser.add_argument("--rules", help="category rules file for the Cashew export (default: category_rules.json)")
+    args = parser.parse_args(argv)
+
+    server = ConversionServer((args.host, args.port), args.workers, args.max_concurrent, args.timeout, args.rules)
+    print(f"Listening on http://{args.host}:{server.server_address[1]} with {server.workers} workers", flush=True)
+    # shutdown() waits for serve_forever to return, so it can't run on this thread.
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
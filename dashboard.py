@@ -0,0 +1,254 @@
+import csv
+import datetime
+import json
+import os
+from collections import defaultdict
+from phonepe_statement import GroupedSummary, PhonePeTxn, TxnKind, format_date, to_paise, to_timestamp
+
+# Aggregates behind the viewer's Summary tab. They are computed once while
+# converting and saved next to the outputs as <statement>_summary.json, so
+# opening a statement never rescans its transactions.
+SUMMARY_VERSION = 1
+SUMMARY_SUFFIX = "_summary.json"
+TOP_GROUPS = 15        # pie slices before "Others"
+DRILLDOWN_GROUPS = 200  # largest groups offered in the per-payee chart
+
+
+def summary_path(grouped_path):
+    # statement_grouped.csv -> statement_summary.json
+    base = os.path.splitext(grouped_path)[0]
+    if base.endswith("_grouped"):
+        base = base[:-len("_grouped")]
+    return base + SUMMARY_SUFFIX
+
+
+class DashboardSummary(GroupedSummary):
+    # GroupedSummary that also keeps monthly credit totals and a monthly
+    # series per (kind, payee) group for the drill-down charts.
+    def __init__(self):
+        super().__init__()
+        self.monthly_credit = defaultdict(int)
+        self.group_monthly = {}  # (kind, payee) -> {"yyyy-mm": paise}
+        self.months = {}  # day -> "yyyy-mm"
+
+    def add(self, txn):
+        super().add(txn)
+        day = txn.day
+        month = self.months.get(day)
+        if month is None:
+            month = self.months[day] = format_date(day)[:7]
+        if txn.kind == TxnKind.CREDIT:
+            self.monthly_credit[month] += txn.paise
+        key = (txn.kind, txn.payee)
+        series = self.group_monthly.get(key)
+        if series is None:
+            series = self.group_monthly[key] = defaultdict(int)
+        series[month] += txn.paise
+
+    def to_dict(self):
+        # Plain JSON data; amounts stay in paise.
+        months = sorted(set(self.monthly_spending) | set(self.monthly_credit))
+        return {
+            "version": SUMMARY_VERSION,
+            # [kind, payee, count, paise, [[month, paise], ...]] in first-seen order
+            "groups": [[str(kind), payee, count, paise, sorted(self.group_monthly[(kind, payee)].items())]
+                       for (kind, payee), (count, paise) in self.grouped.items()],
+            "daily": [[format_date(day), paise] for day, paise in sorted(self.daily_spending.items())],
+            "monthly": [[month, self.monthly_spending.get(month, 0), self.monthly_credit.get(month, 0)]
+                        for month in months],
+        }
+
+
+def write_summary(data, path):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as fo:
+        json.dump(data, fo, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def load_summary(path):
+    # The saved aggregates, or None if missing, unreadable or from another version.
+    try:
+        with open(path, encoding='utf-8') as fo:
+            data = json.load(fo)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != SUMMARY_VERSION:
+        return None
+    return data
+
+
+def iter_saved_transactions(path):
+    # Transactions back from a plain CSV (or an Arrow/Parquet copy), for
+    # outputs converted before the summary was saved with them.
+    from columnar_export import is_columnar, read_columnar
+    if is_columnar(path):
+        for row in read_columnar(path).to_pylist():
+            yield PhonePeTxn(to_timestamp(row["timestamp"]), row["payee"], row["txn_id"], row["utr_no"],
+                             row["payer"], row["kind"], int(row["amount"] * 100))
+        return
+    days, times = {}, {}  # few distinct values, so strptime runs once for each
+    with open(path, newline='', encoding='utf-8') as fo:
+        reader = csv.reader(fo)
+        next(reader, None)
+        for date, time, payee, txn_id, utr_no, payer, kind, amount in reader:
+            day = days.get(date)
+            if day is None:
+                day = days[date] = to_timestamp(datetime.datetime.strptime(date, "%Y-%m-%d"))
+            seconds = times.get(time)
+            if seconds is None:
+                dt = datetime.datetime.strptime(time, "%I:%M %p")
+                seconds = times[time] = dt.hour * 3600 + dt.minute * 60
+            yield PhonePeTxn(day + seconds, payee, txn_id, utr_no, payer, kind, to_paise(amount.lstrip("₹")))
+
+
+def summary_for(all_path, grouped_path):
+    # Loads <statement>_summary.json, building and saving it from the
+    # transactions file the first time.
+    path = summary_path(grouped_path)
+    data = load_summary(path)
+    if data is None:
+        summary = DashboardSummary()
+        for txn in iter_saved_transactions(all_path):
+            summary.add(txn)
+        data = summary.to_dict()
+        try:
+            write_summary(data, path)
+        except OSError:
+            pass
+    return data
+
+
+def plotly_js_dir():
+    # Directory holding plotly.min.js from the installed plotly package, so
+    # the dashboard works offline. The copy is named by version and written
+    # once.
+    import plotly
+    from plotly.offline import get_plotlyjs
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    assets_dir = os.path.join(app_dir, "output", ".assets", f"plotly-{plotly.__version__}")
+    js_path = os.path.join(assets_dir, "plotly.min.js")
+    if not os.path.exists(js_path):
+        os.makedirs(assets_dir, exist_ok=True)
+        tmp_path = f"{js_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as fo:
+            fo.write(get_plotlyjs())
+        os.replace(tmp_path, js_path)
+    return assets_dir
+
+
+def summary_stats(data):
+    # Figures shown next to the pie chart, in rupees.
+    groups = sorted((g for g in data["groups"] if g[3] > 0), key=lambda g: g[3], reverse=True)
+    stats = {"most_sent_to": (groups[0][1], groups[0][3] / 100) if groups else ("None", 0),
+             "most_spent_day": ("N/A", 0), "avg_daily": 0, "avg_weekly": 0, "avg_monthly": 0}
+    daily = data["daily"]
+    if daily:
+        day, paise = max(daily, key=lambda d: d[1])
+        first = datetime.date.fromisoformat(daily[0][0])
+        last = datetime.date.fromisoformat(daily[-1][0])
+        avg_daily = sum(p for _, p in daily) / 100 / ((last - first).days + 1)
+        stats.update(most_spent_day=(day, paise / 100), avg_daily=avg_daily, avg_weekly=avg_daily * 7,
+                     avg_monthly=avg_daily * 30)
+    return stats
+
+
+def dashboard_html(data):
+    # Pie of the largest groups, monthly trend and a per-payee monthly series
+    # (pick a group in the list or click a pie slice). Everything is drawn
+    # from the saved aggregates, so the size of the page does not depend on
+    # the number of transactions. Expects plotly.min.js next to the page.
+    import html
+    import plotly.graph_objects as go
+
+    groups = sorted((g for g in data["groups"] if g[3] > 0), key=lambda g: g[3], reverse=True)
+    top = groups[:TOP_GROUPS]
+    others_total = sum(g[3] for g in groups[TOP_GROUPS:])
+    labels = [g[1] for g in top] + (["Others"] if others_total > 0 else [])
+    values = [g[3] / 100 for g in top] + ([others_total / 100] if others_total > 0 else [])
+
+    pie = go.Figure(data=[go.Pie(
+        labels=labels,
+        values=values,
+        hovertemplate='%{label}<br>₹%{value:,.2f}<br>%{percent}',
+        textinfo='percent',
+        name=''
+    )])
+    pie.update_layout(title_text="Top 15 Groups + Others (Transaction Summary)")
+
+    months = [m[0] for m in data["monthly"]]
+    trend = go.Figure(data=[
+        go.Bar(x=months, y=[m[1] / 100 for m in data["monthly"]], name="Spent (DEBIT)",
+               hovertemplate='%{x}<br>₹%{y:,.2f}'),
+        go.Bar(x=months, y=[m[2] / 100 for m in data["monthly"]], name="Received (CREDIT)",
+               hovertemplate='%{x}<br>₹%{y:,.2f}'),
+    ])
+    trend.update_layout(title_text="Monthly Trend", barmode="group", xaxis_type="category")
+
+    stats = summary_stats(data)
+    drilldown = [[g[0], g[1], g[4]] for g in groups[:DRILLDOWN_GROUPS]]
+    drilldown_json = json.dumps(drilldown, ensure_ascii=False).replace("</", "<\\/")
+    options = "".join(f'<option value="{i}">{html.escape(g[1])} ({g[0]})</option>' for i, g in enumerate(drilldown))
+
+    stats_html = f"""
+    <div style="
+        position: fixed;
+        bottom: 20px;
+        right: 20px;
+        background-color: rgba(255, 255, 255, 0.95);
+        padding: 10px 14px;
+        border-radius: 10px;
+        font-family: Arial, sans-serif;
+        font-size: 12px;
+        color: #222;
+        box-shadow: 0 3px 8px rgba(0, 0, 0, 0.1);
+        max-width: 260px;
+        z-index: 9999;
+        line-height: 1.3;
+    ">
+        <b style="font-size: 14px; display: block; margin-bottom: 8px; color: #333;">Summary Stats</b>
+        <ul style="list-style-type: none; padding-left: 14px; margin: 0;">
+            <li style="margin-bottom: 6px;"><b>Most Amount Sent To:</b> {html.escape(stats['most_sent_to'][0])}<br>₹{stats['most_sent_to'][1]:,.2f}</li>
+            <li style="margin-bottom: 6px;"><b>Most Spent Day:</b> {stats['most_spent_day'][0]}<br>₹{stats['most_spent_day'][1]:,.2f}</li>
+            <li style="margin-bottom: 6px;"><b>Average Daily Spend:</b> ₹{stats['avg_daily']:,.2f}</li>
+            <li style="margin-bottom: 6px;"><b>Average Weekly Spend:</b> ₹{stats['avg_weekly']:,.2f}</li>
+            <li><b>Average Monthly Spend:</b> ₹{stats['avg_monthly']:,.2f}</li>
+        </ul>
+    </div>
+    """
+
+    drilldown_html = f"""
+    <div style="font-family: Arial, sans-serif; font-size: 13px; margin: 10px;">
+        <b>Payee:</b> <select id="payee-select">{options}</select>
+    </div>
+    <div id="payee-chart"></div>
+    <script>
+        var groups = {drilldown_json};
+        function showGroup(i) {{
+            var g = groups[i];
+            if (!g) return;
+            document.getElementById('payee-select').value = i;
+            Plotly.react('payee-chart', [{{
+                type: 'bar',
+                x: g[2].map(function (p) {{ return p[0]; }}),
+                y: g[2].map(function (p) {{ return p[1] / 100; }}),
+                hovertemplate: '%{{x}}<br>₹%{{y:,.2f}}<extra></extra>'
+            }}], {{title: {{text: g[1] + ' (' + g[0] + ') per Month'}}, xaxis: {{type: 'category'}}}});
+        }}
+        document.getElementById('payee-select').addEventListener('change', function (e) {{
+            showGroup(+e.target.value);
+        }});
+        document.getElementById('pie-chart').on('plotly_click', function (e) {{
+            var label = e.points[0].label;
+            for (var i = 0; i < groups.length; i++) {{
+                if (groups[i][1] === label) {{ showGroup(i); break; }}
+            }}
+        }});
+        showGroup(0);
+    </script>
+    """
+
+    pie_html = pie.to_html(include_plotlyjs=False, full_html=False, div_id="pie-chart")
+    trend_html = trend.to_html(include_plotlyjs=False, full_html=False, div_id="trend-chart")
+    return (f'<html><head><meta charset="utf-8"><script src="plotly.min.js"></script></head>'
+            f'<body>{stats_html}{pie_html}{trend_html}{drilldown_html}</body></html>')
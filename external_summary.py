@@ -0,0 +1,191 @@
+import csv
+import heapq
+import marshal
+import os
+import tempfile
+from phonepe_statement import GroupedSummary, TxnKind, format_amount, format_date, week_key
+
+DEFAULT_MEMORY_MB = 256
+# Rough size of one (kind, payee) group in memory: key tuple, value list,
+# dict slot and the payee string.
+GROUP_BYTES = 400
+# Spilled groups are marshalled in batches of this many.
+RUN_BATCH = 4096
+# Most run files open at once; more runs are merged in several passes.
+MERGE_FAN_IN = 64
+
+
+def write_run(path, items):
+    with open(path, "wb") as fo:
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) == RUN_BATCH:
+                marshal.dump(batch, fo)
+                batch = []
+        if batch:
+            marshal.dump(batch, fo)
+
+
+def read_run(path):
+    with open(path, "rb") as fo:
+        while True:
+            try:
+                batch = marshal.load(fo)
+            except EOFError:
+                return
+            yield from batch
+
+
+def combine(groups):
+    # Adds up neighbouring (kind, payee, count, paise, first seen) entries
+    # with the same key, as they come out of merging key-sorted runs.
+    last = None
+    for kind, payee, count, paise, seen in groups:
+        if last is not None and last[0] == kind and last[1] == payee:
+            last[2] += count
+            last[3] += paise
+            last[4] = min(last[4], seen)
+            continue
+        if last is not None:
+            yield tuple(last)
+        last = [kind, payee, count, paise, seen]
+    if last is not None:
+        yield tuple(last)
+
+
+class ExternalGroupedSummary(GroupedSummary):
+    # GroupedSummary for inputs with more (kind, payee) groups than fit in
+    # memory_mb. Once the groups pass that budget they are sorted by key and
+    # spilled to a run file; rows() merges the runs and restores first-seen
+    # order with a second external sort, so the CSV is identical to the
+    # in-memory one. Daily, weekly and monthly totals (one entry per day)
+    # stay in memory. Use as a context manager, or close(), to remove the
+    # run files.
+    def __init__(self, memory_mb=DEFAULT_MEMORY_MB, tmp_dir=None):
+        super().__init__()
+        self.max_groups = max(1, int(memory_mb * 1024 * 1024) // GROUP_BYTES)
+        self.tmp_dir = tmp_dir
+        self.tmp = None
+        self.runs = []
+        self.run_count = 0
+        self.seen = 0  # first-seen sequence number of the next new group
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.tmp is not None:
+            self.tmp.cleanup()
+            self.tmp = None
+        self.runs = []
+
+    def add(self, txn):
+        # Like GroupedSummary.add; the top payees come from the merged groups
+        # instead of debit_amounts/credit_amounts, which would grow as large.
+        amt = txn.paise
+        key = (txn.kind, txn.payee)
+        group = self.grouped.get(key)
+        if group is None:
+            self.grouped[key] = [1, amt, self.seen]
+            self.seen += 1
+            if len(self.grouped) > self.max_groups:
+                self.spill()
+        else:
+            group[0] += 1
+            group[1] += amt
+
+        if txn.kind == TxnKind.DEBIT:
+            day = txn.day
+            self.daily_spending[day] += amt
+            self.weekly_spending[week_key(day)] += amt
+            self.monthly_spending[format_date(day)[:7]] += amt  # yyyy-mm
+
+    def run_path(self):
+        if self.tmp is None:
+            self.tmp = tempfile.TemporaryDirectory(prefix="phonepe-groups-", dir=self.tmp_dir)
+        self.run_count += 1
+        return os.path.join(self.tmp.name, f"run{self.run_count}")
+
+    def spill(self):
+        # Runs hold (kind, payee, count, paise, first seen), sorted by key.
+        path = self.run_path()
+        write_run(path, sorted((str(kind), payee, count, paise, seen)
+                               for (kind, payee), (count, paise, seen) in self.grouped.items()))
+        self.runs.append(path)
+        self.grouped.clear()
+
+    def iter_groups(self):
+        # (kind, payee, count, paise) in first-seen order.
+        if not self.runs:
+            for (kind, payee), (count, paise, _) in self.grouped.items():
+                yield kind, payee, count, paise
+            return
+        if self.grouped:
+            self.spill()
+
+        # Merge the key-sorted runs, combining groups split across them,
+        # into runs sorted by first-seen number...
+        by_seen = []
+        groups = []
+        for kind, payee, count, paise, seen in self.merge_runs(self.runs, combine):
+            groups.append((seen, kind, payee, count, paise))
+            if len(groups) >= self.max_groups:
+                by_seen.append(self.sorted_run(groups))
+        if groups:
+            by_seen.append(self.sorted_run(groups))
+        self.runs = by_seen
+
+        # ...then merge those back into first-seen order.
+        for _, kind, payee, count, paise in self.merge_runs(by_seen):
+            yield kind, payee, count, paise
+
+    def sorted_run(self, groups):
+        path = self.run_path()
+        groups.sort()
+        write_run(path, groups)
+        groups.clear()
+        return path
+
+    def merge_runs(self, runs, reduce=iter):
+        # heapq.merge over the runs, in passes of MERGE_FAN_IN files when
+        # there are more. Runs merged in a pass are deleted.
+        while len(runs) > MERGE_FAN_IN:
+            passes = []
+            for i in range(0, len(runs), MERGE_FAN_IN):
+                path = self.run_path()
+                write_run(path, reduce(heapq.merge(*map(read_run, runs[i:i + MERGE_FAN_IN]))))
+                for done in runs[i:i + MERGE_FAN_IN]:
+                    os.remove(done)
+                passes.append(path)
+            runs = passes
+        return reduce(heapq.merge(*map(read_run, runs)))
+
+    def rows(self):
+        # Rows of the grouped summary CSV, generated as the runs are merged.
+        yield ["Type", "Payee", "Count", "Total Amount"]
+        most_spent_to = most_received_from = None
+        for kind, payee, count, paise in self.iter_groups():
+            yield [kind, payee, count, format_amount(paise)]
+            # First maximum in first-seen order, as max() over debit_amounts.
+            if kind == TxnKind.DEBIT:
+                if most_spent_to is None or paise > most_spent_to[1]:
+                    most_spent_to = (payee, paise)
+            elif kind == TxnKind.CREDIT:
+                if most_received_from is None or paise > most_received_from[1]:
+                    most_received_from = (payee, paise)
+        yield from self.summary_rows(most_spent_to or ("None", 0), most_received_from or ("None", 0))
+
+
+def write_grouped_csv(txns, output_file, memory_mb=DEFAULT_MEMORY_MB, tmp_dir=None):
+    # phonepe_statement.write_grouped_csv with the groups kept under
+    # memory_mb; spilled runs go to tmp_dir (default: the system temp dir).
+    with ExternalGroupedSummary(memory_mb, tmp_dir) as summary:
+        for txn in txns:
+            summary.add(txn)
+        with open(output_file, 'w', newline='', encoding='utf-8') as fo:
+            csv.writer(fo).writerows(summary.rows())
+    return summary
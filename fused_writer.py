@@ -0,0 +1,95 @@
+import csv
+from cashew_csv_export import CASHEW_HEADER, make_cashew_row, peek_extended_fields
+from dashboard import DashboardSummary, write_summary
+from external_summary import ExternalGroupedSummary
+from phonepe_statement import CSV_HEADER, GroupedSummary
+
+# Rows are handed to the csv writers in batches of this many.
+BATCH_ROWS = 4096
+
+
+class OutputTables:
+    # What write_outputs produced. plain and cashew hold every row (header
+    # first) when keep_rows was set; grouped always does.
+    def __init__(self):
+        self.count = 0
+        self.plain = None
+        self.grouped = None
+        self.cashew = None
+        self.summary = None  # GroupedSummary
+        self.dashboard = None  # dashboard aggregates, when a summary_file was written
+
+
+def write_outputs(txns, out_file=None, grouped_file=None, cashew_file=None, payee_category_map=None, rules=None,
+                  keep_rows=False, summary_file=None, group_memory_mb=None):
+    # Writes the plain CSV, the grouped summary and the Cashew export in one
+    # pass over txns. Any of the three files may be None to skip it. The
+    # output is identical to write_csv, write_grouped_csv and
+    # export_for_cashew. summary_file receives the dashboard aggregates.
+    # group_memory_mb bounds the memory used for the grouped summary's
+    # groups (see external_summary); it can't be combined with summary_file.
+    tables = OutputTables()
+    txns, has_category, has_note = peek_extended_fields(txns)
+    cashew_row = make_cashew_row(payee_category_map, rules, has_category, has_note)
+    if group_memory_mb and grouped_file:
+        if summary_file:
+            raise ValueError("summary_file needs the in-memory grouped summary.")
+        summary = ExternalGroupedSummary(group_memory_mb)
+    elif summary_file:
+        summary = DashboardSummary()
+    else:
+        summary = GroupedSummary() if grouped_file else None
+
+    files = []
+    outputs = []  # (csv writer, rows); both row lists grow in step
+    plain_rows = [CSV_HEADER] if out_file else None
+    cashew_rows = [CASHEW_HEADER] if cashew_file else None
+    try:
+        for path, rows in ((out_file, plain_rows), (cashew_file, cashew_rows)):
+            if path:
+                files.append(open(path, 'w', newline='', encoding='utf-8'))
+                outputs.append((csv.writer(files[-1]), rows))
+
+        count = 0
+        written = 0  # rows of each list already written
+
+        def flush():
+            for writer, rows in outputs:
+                writer.writerows(rows[written:])
+                if not keep_rows:
+                    rows.clear()
+            return len(outputs[0][1]) if keep_rows and outputs else 0
+
+        for txn in txns:
+            count += 1
+            if plain_rows is not None:
+                plain_rows.append(txn.to_row())
+            if summary is not None:
+                summary.add(txn)
+            if cashew_rows is not None:
+                cashew_rows.append(cashew_row(txn))
+            if count % BATCH_ROWS == 0:
+                written = flush()
+        flush()
+    finally:
+        for fo in files:
+            fo.close()
+
+    if grouped_file:
+        rows = summary.rows()
+        with open(grouped_file, 'w', newline='', encoding='utf-8') as fo:
+            csv.writer(fo).writerows(rows)
+        if isinstance(summary, ExternalGroupedSummary):
+            # Its rows were streamed from disk, not kept.
+            summary.close()
+        else:
+            tables.grouped = rows
+    if summary_file and count:
+        tables.dashboard = summary.to_dict()
+        write_summary(tables.dashboard, summary_file)
+    tables.count = count
+    tables.summary = summary
+    if keep_rows:
+        tables.plain = plain_rows
+        tables.cashew = cashew_rows
+    return tables
@@ -0,0 +1,157 @@
+import io
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+PROFILE_TOP = 25
+MEMORY_TOP = 10
+
+
+class Stats:
+    # Per-stage wall-clock timings and counters for one conversion, with
+    # optional cProfile and tracemalloc capture. Stages are exclusive: time
+    # spent in a nested stage (e.g. extraction pulled lazily by parsing) is
+    # not counted again in the enclosing one.
+    def __init__(self, profile=False, trace_memory=False):
+        self.seconds = Counter()
+        self.counters = Counter()
+        self.parsers = []
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self._stack = []
+        self._profiler = None
+        self._memory = None
+        self._started = None
+        self._total = 0.0
+
+    def start(self):
+        self._started = time.perf_counter()
+        if self.profile:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+        return self
+
+    def stop(self):
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self.trace_memory:
+            import tracemalloc
+            peak = tracemalloc.get_traced_memory()[1]
+            top = tracemalloc.take_snapshot().statistics("lineno")[:MEMORY_TOP]
+            tracemalloc.stop()
+            self._memory = {
+                "peak_bytes": peak,
+                "top": [{"location": str(stat.traceback[0]), "bytes": stat.size} for stat in top],
+            }
+        if self._started is not None:
+            self._total += time.perf_counter() - self._started
+            self._started = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _enter(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            parent = self._stack[-1]
+            self.seconds[parent[0]] += now - parent[1]
+        self._stack.append([name, now])
+
+    def _exit(self):
+        now = time.perf_counter()
+        name, started = self._stack.pop()
+        self.seconds[name] += now - started
+        if self._stack:
+            self._stack[-1][1] = now
+
+    @contextmanager
+    def stage(self, name):
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def timed_iter(self, name, iterable):
+        # Times only the work done producing each item, so a lazy pipeline
+        # can be attributed stage by stage.
+        it = iter(iterable)
+        while True:
+            self._enter(name)
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+            finally:
+                self._exit()
+            yield item
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def watch(self, parser):
+        # RecordParser counters (v1/v2/fast hits, dropped records) are read
+        # when the stats are reported.
+        self.parsers.append(parser)
+        return parser
+
+    def all_counters(self):
+        counters = Counter(self.counters)
+        for parser in self.parsers:
+            counters.update(parser.counts)
+        return counters
+
+    def profile_rows(self):
+        import pstats
+        stats = pstats.Stats(self._profiler, stream=io.StringIO()).sort_stats("cumulative")
+        rows = []
+        for func in stats.fcn_list[:PROFILE_TOP]:
+            calls, primitive, tottime, cumtime, _ = stats.stats[func]
+            filename, line, name = func
+            rows.append({
+                "function": f"{filename}:{line}({name})", "calls": calls,
+                "tottime": round(tottime, 4), "cumtime": round(cumtime, 4),
+            })
+        return rows
+
+    def to_dict(self):
+        result = {
+            "total_seconds": round(self._total, 4),
+            "stages": {name: round(seconds, 4) for name, seconds in self.seconds.items()},
+            "counters": dict(self.all_counters()),
+        }
+        if self._profiler is not None:
+            result["profile"] = self.profile_rows()
+        if self._memory is not None:
+            result["memory"] = self._memory
+        return result
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+
+def format_stats(stats):
+    # Plain-text report of Stats.to_dict() output, for the GUI panel.
+    lines = [f"Total: {stats['total_seconds']:.3f}s", "", "Stages:"]
+    for name, seconds in sorted(stats["stages"].items(), key=lambda x: -x[1]):
+        lines.append(f"  {name:<22} {seconds:8.3f}s")
+    lines += ["", "Counters:"]
+    for name, value in sorted(stats["counters"].items()):
+        lines.append(f"  {name:<22} {value:>8}")
+    if "memory" in stats:
+        lines += ["", f"Peak traced memory: {stats['memory']['peak_bytes'] / 1024 / 1024:.1f} MiB"]
+        for row in stats["memory"]["top"]:
+            lines.append(f"  {row['bytes'] / 1024:8.1f} KiB  {row['location']}")
+    if "profile" in stats:
+        lines += ["", "Profile (by cumulative time):"]
+        for row in stats["profile"]:
+            lines.append(f"  {row['cumtime']:8.3f}s {row['calls']:>8}  {row['function']}")
+    return "\n".join(lines)
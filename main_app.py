@@ -1,198 +1,101 @@
 import sys
 import os
-import re
-import csv
-import datetime
-import fitz  # PyMuPDF
-from collections import defaultdict, Counter
-from statistics import mean
-from cashew_csv_export import export_for_cashew
-from TransactionViewer import TransactionViewer
+import json
+import multiprocessing
+from cashew_csv_export import default_cashew_filename
+from category_rules import load_rules, save_rules
+from dashboard import SUMMARY_SUFFIX
+from fused_writer import write_outputs
+from instrumentation import Stats, format_stats
+from parse_cache import load_transactions_cached
+from phonepe_statement import default_workers, get_output_path, open_pdf
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QPushButton, QFileDialog,
-    QLabel, QMessageBox, QCheckBox, QLineEdit, QDialog, QDialogButtonBox, QHBoxLayout
+    QLabel, QMessageBox, QCheckBox, QLineEdit, QDialog, QDialogButtonBox, QHBoxLayout, QSpinBox,
+    QProgressBar, QPlainTextEdit
 )
-from PyQt6.QtGui import QFont
-from PyQt6.QtCore import Qt
-
-START_OF_RECORD_MARKER = re.compile(r'^[A-Z][a-z][a-z]\s\d{2},\s20\d{2}$')
-
-class PhonePeTxn:
-    def __init__(self, date, time, payee, txn_id, utr_no, payer, kind, amount):
-        self.date = date
-        self.time = time
-        self.payee = payee
-        self.txn_id = txn_id
-        self.utr_no = utr_no
-        self.payer = payer
-        self.kind = kind
-        self.amount = amount
-
-
-    def to_row(self):
-        return [self.date, self.time, self.payee, self.txn_id, self.utr_no, self.payer, self.kind, self.amount]
-def get_output_path(pdf_path, suffix=".csv"):
-    app_dir = os.path.dirname(os.path.abspath(__file__))
-    output_dir = os.path.join(app_dir, "output")
-    os.makedirs(output_dir, exist_ok=True)
-    base_name = os.path.basename(pdf_path).replace(".pdf", suffix)
-    return os.path.join(output_dir, base_name)
-
-def extract_text_from_pdf(pdf_path, password=None):
-    try:
-        with fitz.open(pdf_path) as doc:
-            if doc.needs_pass:
-                if not password or not doc.authenticate(password):
-                    raise RuntimeError("Password required or incorrect password.")
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            return text
-    except Exception as e:
-        raise e
-
-def parse_transactions(text):
-    lines = text.strip().split('\n')
-    records = []
-    rec = []
-    txns = []
-
-    for l in lines:
-        if START_OF_RECORD_MARKER.match(l):
-            if rec:
-                txn = try_all_parsers(rec)
-                if txn:
-                    txns.append(txn)
-            rec = [l]
-        else:
-            rec.append(l)
-
-    if rec:
-        txn = try_all_parsers(rec)
-        if txn:
-            txns.append(txn)
-
-    return txns
-
-def try_all_parsers(rec):
-    for parser in [mk_record_v1, mk_record_v2]:
-        txn = parser(rec)
-        if txn:
-            return txn
-    return None
-
-def mk_record_v1(r):
-    try:
-        if len(r) < 8:
-            return None
-        # Check if r[2] is a known kind and r[3] starts with ₹ or is numeric
-        if not r[3].lstrip().startswith("₹") and not r[3].replace(",", "").strip().replace(".", "").isdigit():
-            return None
-        dt = datetime.datetime.strptime(r[0] + " " + r[1], "%b %d, %Y %I:%M %p")
-        kind = r[2].strip()
-        amount_str = "₹" + r[3].replace("₹", "").replace(",", "").strip()
-        payee = r[4].strip()
-        txn_id = r[5].split()[-1] if len(r) > 5 else ""
-        utr_no = "\t" + r[6].split()[-1] if len(r) > 6 else ""
-        payer = r[8] if len(r) > 8 else ""
-        return PhonePeTxn(
-            date=dt.strftime("%Y-%m-%d"),
-            time=dt.strftime("%I:%M %p"),
-            payee=payee,
-            txn_id=txn_id,
-            utr_no=utr_no,
-            payer=payer,
-            kind=kind,
-            amount=amount_str
-        )
-    except Exception:
-        return None
-
-def mk_record_v2(r):
-    try:
-        if len(r) < 8:
-            return None
-        if not any(keyword in r[2] for keyword in ["Paid to", "Received from", "Refund", "Payment to"]):
-            return None
-
-        dt = datetime.datetime.strptime(r[0] + " " + r[1], "%b %d, %Y %I:%M %p")
-        payee = r[2].strip()
-        txn_id = r[3].split()[-1]
-        utr_no = "\t" + r[4].split()[-1]
-        payer = r[5].strip()
-        kind = r[6].strip()
-        amount_line = r[8].strip() if len(r) > 8 and r[7].strip().endswith("INR") else r[7].strip()
-        match = re.search(r'[\d,]+(?:\.\d+)?', amount_line)
-        amount_val = float(match.group().replace(',', '')) if match else 0.0
-        amount_str = f"₹{amount_val:.2f}"
-
-        return PhonePeTxn(
-            date=dt.strftime("%Y-%m-%d"),
-            time=dt.strftime("%I:%M %p"),
-            payee=payee,
-            txn_id=txn_id,
-            utr_no=utr_no,
-            payer=payer,
-            kind=kind,
-            amount=amount_str
-        )
-    except Exception:
-        return None
-
-def write_csv(txns, output_file):
-    with open(output_file, 'w', newline='', encoding='utf-8') as fo:
-        writer = csv.writer(fo)
-        writer.writerow(["Date", "Time", "Payee", "Transaction ID", "UTR No.", "Payer", "Type", "Amount"])
-        for txn in txns:
-            writer.writerow(txn.to_row())
-
-def write_grouped_csv(txns, output_file):
-    grouped = defaultdict(lambda: {"count": 0, "amount": 0.0})
-    debit_amounts = defaultdict(float)
-    credit_amounts = defaultdict(float)
-    daily_spending = defaultdict(float)
-    weekly_spending = defaultdict(float)
-    monthly_spending = defaultdict(float)
-
-    for txn in txns:
-        amt = float(txn.amount.replace("₹", ""))
-        key = (txn.kind, txn.payee)
-        grouped[key]["count"] += 1
-        grouped[key]["amount"] += amt
-
-        if txn.kind == "DEBIT":
-            debit_amounts[txn.payee] += amt
-            daily_spending[txn.date] += amt
-            week = datetime.datetime.strptime(txn.date, "%Y-%m-%d").isocalendar().week
-            week_key = f"{txn.date[:4]}-W{week}"
-            weekly_spending[week_key] += amt
-            month_key = txn.date[:7]  # yyyy-mm
-            monthly_spending[month_key] += amt
-        elif txn.kind == "CREDIT":
-            credit_amounts[txn.payee] += amt
-
-    most_spent_to = max(debit_amounts.items(), key=lambda x: x[1], default=("None", 0))
-    most_received_from = max(credit_amounts.items(), key=lambda x: x[1], default=("None", 0))
-    most_spent_day = max(daily_spending.items(), key=lambda x: x[1], default=("None", 0))
-
-    avg_day = mean(daily_spending.values()) if daily_spending else 0
-    avg_week = mean(weekly_spending.values()) if weekly_spending else 0
-    avg_month = mean(monthly_spending.values()) if monthly_spending else 0
-
-    with open(output_file, 'w', newline='', encoding='utf-8') as fo:
-        writer = csv.writer(fo)
-        writer.writerow(["Type", "Payee", "Count", "Total Amount"])
-        for (kind, payee), stats in grouped.items():
-            writer.writerow([kind, payee, stats["count"], f"₹{stats['amount']:.2f}"])
-
-        writer.writerow([])
-        writer.writerow(["Summary"])
-        writer.writerow(["Most Amount Sent To", most_spent_to[0], f"₹{most_spent_to[1]:.2f}"])
-        writer.writerow(["Most Amount Received From", most_received_from[0], f"₹{most_received_from[1]:.2f}"])
-        writer.writerow(["Most Spent Day", most_spent_day[0], f"₹{most_spent_day[1]:.2f}"])
-        writer.writerow(["Average Daily Spend", f"₹{avg_day:.2f}"])
-        writer.writerow(["Average Weekly Spend", f"₹{avg_week:.2f}"])
-        writer.writerow(["Average Monthly Spend", f"₹{avg_month:.2f}"])
+from PyQt6.QtGui import QFont, QGuiApplication
+from PyQt6.QtCore import Qt, QObject, QThread, pyqtSignal
+
+class ConversionCancelled(Exception):
+    pass
+
+class ConversionWorker(QObject):
+    # Runs extraction, parsing and CSV writing off the GUI thread. Dialogs
+    # (password, category rules) are handled by the caller beforehand.
+    progress = pyqtSignal(int, int)  # pages done, page count
+    finished = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, pdf_path, password, workers, grouped, cashew_rules, layout=False):
+        super().__init__()
+        self.pdf_path = pdf_path
+        self.password = password
+        self.workers = workers
+        self.grouped = grouped
+        self.cashew_rules = cashew_rules  # None when no Cashew export
+        self.layout = layout
+        self.stats = Stats()
+        self._cancel = False
+
+    def cancel(self):
+        self._cancel = True
+
+    def report_progress(self, done, total):
+        if self._cancel:
+            raise ConversionCancelled()
+        self.progress.emit(done, total)
+
+    def run(self):
+        try:
+            with self.stats:
+                result = self.convert()
+            result["stats"] = self.stats.to_dict()
+            self.finished.emit(result)
+        except ConversionCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def convert(self):
+        result = {"out_file": None, "grouped_file": None, "cashew_file": None, "dashboard": None, "tables": None}
+        # Re-converting the same statement (e.g. to try other category
+        # rules) reuses the cached parse and skips extraction entirely.
+        txns = load_transactions_cached(self.pdf_path, self.password, self.workers, self.report_progress,
+                                        stats=self.stats, layout=self.layout)
+
+        out_file = get_output_path(self.pdf_path, ".csv")
+        grouped_file = get_output_path(self.pdf_path, "_grouped.csv") if self.grouped else None
+        # The Summary tab is drawn from aggregates saved with the grouped CSV.
+        summary_file = get_output_path(self.pdf_path, SUMMARY_SUFFIX) if self.grouped else None
+        cashew_file = None
+        if self.cashew_rules is not None:
+            cashew_file = os.path.join(os.path.dirname(out_file), default_cashew_filename())
+
+        # All outputs are written in one pass and their rows kept for the
+        # viewer, so it doesn't read the CSVs back. Parsing runs inside that
+        # pass, so a cancel or parse error leaves partly written files.
+        try:
+            with self.stats.stage("write_outputs"):
+                tables = write_outputs(txns, out_file, grouped_file, cashew_file, rules=self.cashew_rules,
+                                       keep_rows=True, summary_file=summary_file)
+        except Exception:
+            self.remove_outputs(out_file, grouped_file, cashew_file)
+            raise
+        self.stats.count("transactions", tables.count)
+        if not tables.count:
+            self.remove_outputs(out_file, grouped_file, cashew_file)
+            raise ValueError("No transactions found.")
+        result.update(out_file=out_file, grouped_file=grouped_file, cashew_file=cashew_file, tables=tables,
+                      dashboard=tables.dashboard)
+        return result
+
+    @staticmethod
+    def remove_outputs(*paths):
+        for path in paths:
+            if path and os.path.exists(path):
+                os.remove(path)
 
 class PasswordDialog(QDialog):
     def __init__(self):
@@ -236,14 +139,16 @@ class PasswordDialog(QDialog):
         return self.input_line.text()
 
 class CategoryInputDialog(QDialog):
-    def __init__(self):
+    def __init__(self, rule_count=0):
         super().__init__()
         self.setWindowTitle("Enter Payee - Category mappings")
-        self.setFixedSize(400, 150)
+        self.setFixedSize(400, 170)
 
         layout = QVBoxLayout()
         label = QLabel("Enter payee-category mappings (format: Payee - Category, ...):")
         layout.addWidget(label)
+        hint = QLabel(f"{rule_count} saved rules apply. End a payee with * to match by prefix.")
+        layout.addWidget(hint)
 
         self.input_line = QLineEdit()
         self.input_line.setPlaceholderText("Example: Amazon - Shopping, Flipkart - Shopping, Salary - Income")
@@ -265,13 +170,41 @@ class CategoryInputDialog(QDialog):
                 mappings[payee.strip()] = category.strip()
         return mappings
 
+class DiagnosticsDialog(QDialog):
+    # Stage timings and parser counters of the last conversion.
+    def __init__(self, stats):
+        super().__init__()
+        self.setWindowTitle("Conversion diagnostics")
+        self.resize(560, 420)
+        self.stats = stats
+
+        layout = QVBoxLayout()
+        text = QPlainTextEdit(format_stats(stats))
+        text.setReadOnly(True)
+        text.setFont(QFont("Courier", 10))
+        layout.addWidget(text)
+
+        self.buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        copy_btn = self.buttons.addButton("Copy JSON", QDialogButtonBox.ButtonRole.ActionRole)
+        copy_btn.clicked.connect(self.copy_json)
+        self.buttons.rejected.connect(self.reject)
+        layout.addWidget(self.buttons)
+
+        self.setLayout(layout)
+
+    def copy_json(self):
+        QGuiApplication.clipboard().setText(json.dumps(self.stats, indent=2))
+
 class PhonePeApp(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("PhonePe PDF to CSV Converter")
-        self.setFixedSize(500, 360)
+        self.setFixedSize(500, 530)
         self.pdf_path = None
         self.viewer_window = None  # Keep reference to the viewer window
+        self.worker_thread = None
+        self.worker = None
+        self.last_stats = None
 
         layout = QVBoxLayout()
 
@@ -293,16 +226,48 @@ class PhonePeApp(QWidget):
         self.cashew_checkbox.setFont(QFont("Helvetica", 11))
         layout.addWidget(self.cashew_checkbox)
 
+        self.layout_checkbox = QCheckBox("Read table by column positions (wrapped payees)")
+        self.layout_checkbox.setFont(QFont("Helvetica", 11))
+        layout.addWidget(self.layout_checkbox)
+
+        workers_layout = QHBoxLayout()
+        workers_label = QLabel("Extraction workers:")
+        workers_label.setFont(QFont("Helvetica", 11))
+        workers_layout.addWidget(workers_label)
+        self.workers_spinbox = QSpinBox()
+        self.workers_spinbox.setRange(1, default_workers())
+        self.workers_spinbox.setValue(default_workers())
+        workers_layout.addWidget(self.workers_spinbox)
+        workers_layout.addStretch()
+        layout.addLayout(workers_layout)
+
         self.convert_btn = QPushButton("Convert to CSV")
         self.convert_btn.setFont(QFont("Helvetica", 12))
         self.convert_btn.clicked.connect(self.convert_to_csv)
         layout.addWidget(self.convert_btn)
 
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFormat("%v / %m pages")
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
+
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.setFont(QFont("Helvetica", 11))
+        self.cancel_btn.clicked.connect(self.cancel_conversion)
+        self.cancel_btn.hide()
+        layout.addWidget(self.cancel_btn)
+
         self.status_label = QLabel("")
         self.status_label.setFont(QFont("Helvetica", 10))
         self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(self.status_label)
 
+        self.diagnostics_btn = QPushButton("Diagnostics")
+        self.diagnostics_btn.setFont(QFont("Helvetica", 10))
+        self.diagnostics_btn.clicked.connect(self.show_diagnostics)
+        self.diagnostics_btn.hide()
+        layout.addWidget(self.diagnostics_btn)
+
         self.setLayout(layout)
 
     def select_pdf(self):
@@ -312,69 +277,121 @@ class PhonePeApp(QWidget):
             self.status_label.setText(f"Selected: {os.path.basename(path)}")
 
     def convert_to_csv(self):
-        cashew_file = None
-        grouped_file = None
         if not self.pdf_path:
             QMessageBox.critical(self, "Error", "Please select a PDF file first.")
             return
 
         try:
+            # Ask for the password here on the GUI thread; the worker only
+            # ever sees a document it can open.
             password = None
             try:
-                text = extract_text_from_pdf(self.pdf_path)
+                open_pdf(self.pdf_path).close()
             except RuntimeError:
                 dlg = PasswordDialog()
-                if dlg.exec() == QDialog.DialogCode.Accepted:
-                    password = dlg.get_password()
-                    text = extract_text_from_pdf(self.pdf_path, password)
-                else:
+                if dlg.exec() != QDialog.DialogCode.Accepted:
                     return
+                password = dlg.get_password()
+                open_pdf(self.pdf_path, password).close()
 
-            txns = parse_transactions(text)
-            if not txns:
-                raise ValueError("No transactions found.")
-
-            out_file = get_output_path(self.pdf_path, ".csv")
-            write_csv(txns, out_file)
-
-            if self.group_checkbox.isChecked():
-                grouped_file = get_output_path(self.pdf_path, "_grouped.csv")
-                write_grouped_csv(txns, grouped_file)
-
+            rules = None
             if self.cashew_checkbox.isChecked():
-                # Show category input dialog
-                cat_dlg = CategoryInputDialog()
+                # Show category input dialog; new mappings are saved to the
+                # rules file so they don't have to be entered again.
+                rules = load_rules()
+                cat_dlg = CategoryInputDialog(len(rules))
                 if cat_dlg.exec() == QDialog.DialogCode.Accepted:
                     mappings = cat_dlg.get_mappings()
-                else:
-                    mappings = {}
-
-                cashew_file = export_for_cashew(
-                    txns,
-                    os.path.join(os.path.dirname(os.path.abspath(__file__)), "output"),
-                    payee_category_map=mappings
-                )
-                QMessageBox.information(self, "Cashew Export", f"Cashew App file created:\n{cashew_file}")
-
-            msg = f"CSV created: {out_file}"
-            if grouped_file:
-                msg += f"\nGrouped CSV: {grouped_file}"
+                    if mappings:
+                        rules.add_mappings(mappings)
+                        save_rules(rules)
+        except Exception as e:
+            QMessageBox.critical(self, "Failed", str(e))
+            return
 
-            QMessageBox.information(self, "Success", msg)
+        self.worker = ConversionWorker(
+            self.pdf_path, password, self.workers_spinbox.value(), self.group_checkbox.isChecked(), rules,
+            self.layout_checkbox.isChecked()
+        )
+        self.worker_thread = QThread()
+        self.worker.moveToThread(self.worker_thread)
+        self.worker_thread.started.connect(self.worker.run)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.finished.connect(self.on_finished)
+        self.worker.failed.connect(self.on_failed)
+        self.worker.cancelled.connect(self.on_cancelled)
+        for signal in (self.worker.finished, self.worker.failed, self.worker.cancelled):
+            signal.connect(self.worker_thread.quit)
+
+        self.set_running(True)
+        self.status_label.setText(f"Converting {os.path.basename(self.pdf_path)}...")
+        self.worker_thread.start()
+
+    def set_running(self, running):
+        self.convert_btn.setEnabled(not running)
+        self.select_btn.setEnabled(not running)
+        self.cancel_btn.setEnabled(True)
+        self.cancel_btn.setVisible(running)
+        self.progress_bar.setVisible(running)
+        if running:
+            self.progress_bar.setRange(0, 0)  # busy until the first page is done
+
+    def cancel_conversion(self):
+        if self.worker:
+            self.worker.cancel()
+            self.cancel_btn.setEnabled(False)
+            self.status_label.setText("Cancelling...")
+
+    def show_diagnostics(self):
+        if self.last_stats:
+            DiagnosticsDialog(self.last_stats).exec()
+
+    def on_progress(self, done, total):
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(done)
+
+    def on_cancelled(self):
+        self.set_running(False)
+        self.status_label.setText("Conversion cancelled.")
+
+    def on_failed(self, error):
+        self.set_running(False)
+        self.status_label.setText("")
+        QMessageBox.critical(self, "Failed", error)
+
+    def on_finished(self, result):
+        self.set_running(False)
+        self.status_label.setText(f"Converted: {os.path.basename(self.pdf_path)}")
+        self.last_stats = result["stats"]
+        self.diagnostics_btn.show()
+
+        if result["cashew_file"]:
+            QMessageBox.information(self, "Cashew Export", f"Cashew App file created:\n{result['cashew_file']}")
+
+        msg = f"CSV created: {result['out_file']}"
+        if result["grouped_file"]:
+            msg += f"\nGrouped CSV: {result['grouped_file']}"
+
+        QMessageBox.information(self, "Success", msg)
 
-            # Open the transaction viewer window to show CSVs
+        try:
+            # Open the transaction viewer window to show CSVs. The viewer pulls in
+            # pandas, plotly and QtWebEngine, so it is only imported when needed.
+            from TransactionViewer import TransactionViewer
             self.viewer_window = TransactionViewer(
-                all_path=out_file,
-                grouped_path=grouped_file,
-                cashew_path=cashew_file
+                all_path=result["out_file"],
+                grouped_path=result["grouped_file"],
+                cashew_path=result["cashew_file"],
+                dashboard=result["dashboard"],
+                tables=result["tables"]
             )
             self.viewer_window.show()
-
         except Exception as e:
             QMessageBox.critical(self, "Failed", str(e))
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = PhonePeApp()
     window.show()
@@ -0,0 +1,213 @@
+import argparse
+import hashlib
+import marshal
+import os
+import sys
+import zlib
+from contextlib import nullcontext
+from phonepe_statement import PARSER_VERSION, PhonePeTxn, in_date_range, load_transactions
+
+MAGIC = b"PPTXNC1\n"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def default_cache_dir():
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.environ.get("PHONEPE_CACHE_DIR") or os.path.join(app_dir, "output", ".cache")
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fo:
+        for block in iter(lambda: fo.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _password_check(password, salt):
+    if password is None:
+        return None
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, 100000)
+
+
+class TxnColumns:
+    # The cached form of a statement, one list per transaction field.
+    # Transactions can be added while they stream to the writers, so an
+    # entry is stored without keeping the transactions themselves.
+    def __init__(self, txns=()):
+        self.columns = ([], [], [], [], [], [], [])
+        self._appends = tuple(col.append for col in self.columns)
+        for txn in txns:
+            self.add(txn)
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def add(self, txn):
+        timestamp, payee, txn_id, utr_no, payer, kind, paise = self._appends
+        timestamp(txn.timestamp)
+        payee(txn.payee)
+        txn_id(txn.txn_id)
+        utr_no(txn.utr_no)
+        payer(txn.payer)
+        kind(str(txn.kind))
+        paise(txn.paise)
+
+
+def encode_transactions(txns, password=None):
+    # Columnar, marshal-serialised and zlib-compressed. Entries for encrypted
+    # statements carry a salted password hash, so a hit still needs the
+    # password that was used to open the PDF. txns may be a TxnColumns.
+    columns = txns if isinstance(txns, TxnColumns) else TxnColumns(txns)
+    salt = os.urandom(16)
+    payload = marshal.dumps((salt, _password_check(password, salt), columns.columns))
+    return MAGIC + zlib.compress(payload, 6)
+
+
+def decode_transactions(data, password=None):
+    # Returns the transactions, or None if the password doesn't match.
+    if not data.startswith(MAGIC):
+        raise ValueError("Not a parse cache entry.")
+    salt, check, columns = marshal.loads(zlib.decompress(data[len(MAGIC):]))
+    if check is not None and check != _password_check(password, salt):
+        return None
+    return [PhonePeTxn(*row) for row in zip(*columns)]
+
+
+class ParseCache:
+    # On-disk cache of parsed statements keyed by the PDF's content hash and
+    # PARSER_VERSION. Least recently used entries are evicted once the
+    # directory grows past max_bytes.
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def key(self, pdf_path, layout=False):
+        # Layout-aware extraction can differ from text extraction (e.g. on
+        # wrapped payees), so it gets entries of its own.
+        return f"{file_hash(pdf_path)}-v{PARSER_VERSION}" + ("-layout" if layout else "")
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, key + ".bin")
+
+    def get(self, key, password=None):
+        path = self.entry_path(key)
+        try:
+            with open(path, "rb") as fo:
+                txns = decode_transactions(fo.read(), password)
+        except (OSError, ValueError, EOFError, zlib.error):
+            return None
+        if txns is not None:
+            os.utime(path)  # mark as recently used
+        return txns
+
+    def put(self, key, txns, password=None):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as fo:
+            fo.write(encode_transactions(txns, password))
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def entries(self):
+        # [(mtime, size, path)], oldest first
+        try:
+            scan = list(os.scandir(self.cache_dir))
+        except FileNotFoundError:
+            return []
+        entries = []
+        for entry in scan:
+            if entry.name.endswith(".bin"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(entries)
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def invalidate(self, pdf_path):
+        # Drops the entries for this PDF's content under every parser version.
+        digest = file_hash(pdf_path)
+        removed = 0
+        for _, _, path in self.entries():
+            if os.path.basename(path).startswith(digest + "-"):
+                os.remove(path)
+                removed += 1
+        return removed
+
+    def clear(self):
+        removed = 0
+        for _, _, path in self.entries():
+            os.remove(path)
+            removed += 1
+        return removed
+
+
+def load_transactions_cached(pdf_path, password=None, workers=1, progress=None, cache=None, stats=None,
+                             layout=False, date_range=None):
+    # Like phonepe_statement.load_transactions, but skips PyMuPDF entirely
+    # when the same PDF was parsed before. A hit returns a list. A miss
+    # streams the parsed transactions and stores the entry once they have
+    # all been consumed. A date_range is served from a cached full parse,
+    # but a partial parse is never stored.
+    cache = cache or ParseCache()
+    with stats.stage("cache_lookup") if stats is not None else nullcontext():
+        key = cache.key(pdf_path, layout)
+        txns = cache.get(key, password)
+    hit = txns is not None
+    if stats is not None:
+        stats.count("cache_hits" if hit else "cache_misses")
+    if hit:
+        return list(in_date_range(txns, *date_range)) if date_range is not None else txns
+    txns = load_transactions(pdf_path, password, workers, progress, stats, layout, date_range)
+    if date_range is not None:
+        return txns
+    return _store_after(txns, cache, key, password, stats)
+
+
+def _store_after(txns, cache, key, password, stats):
+    columns = TxnColumns()
+    add = columns.add
+    for txn in txns:
+        add(txn)
+        yield txn
+    if len(columns):
+        with stats.stage("cache_store") if stats is not None else nullcontext():
+            cache.put(key, columns, password)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="parse_cache", description="Manage the parsed statement cache.")
+    parser.add_argument("--cache-dir", help="cache directory (default: output/.cache or $PHONEPE_CACHE_DIR)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("info", help="show the cache location and size")
+    commands.add_parser("clear", help="remove every cached statement")
+    invalidate = commands.add_parser("invalidate", help="remove the cached results for the given PDFs")
+    invalidate.add_argument("pdfs", nargs="+")
+    args = parser.parse_args(argv)
+
+    cache = ParseCache(args.cache_dir)
+    if args.command == "info":
+        entries = cache.entries()
+        size = sum(size for _, size, _ in entries)
+        print(f"{cache.cache_dir}: {len(entries)} entries, {size / 1024:.1f} KiB")
+    elif args.command == "clear":
+        print(f"Removed {cache.clear()} entries.")
+    else:
+        for pdf_path in args.pdfs:
+            print(f"{pdf_path}: removed {cache.invalidate(pdf_path)} entries")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,236 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+from category_rules import load_rules
+from columnar_export import write_columnar
+from dashboard import SUMMARY_SUFFIX
+from fused_writer import write_outputs
+from instrumentation import Stats
+from parse_cache import ParseCache, load_transactions_cached
+from phonepe_statement import day_number, format_date, get_output_path, load_transactions
+
+OUTPUTS = ("plain", "grouped", "cashew")
+# Typed columnar files for fast reloading; need pyarrow, so never a default.
+COLUMNAR_OUTPUTS = {"arrow": ".arrow", "parquet": ".parquet"}
+
+
+def is_pdf(name):
+    return name.lower().endswith(".pdf")
+
+
+def expand_inputs(inputs):
+    # Accept files, directories (their .pdf files, any case) and glob
+    # patterns, which are expanded here as well since Windows shells don't do
+    # it for us.
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = sorted(path for path in glob.glob(os.path.join(item, "*"))
+                             if is_pdf(path) and os.path.isfile(path))
+        elif glob.has_magic(item):
+            matches = sorted(glob.glob(item))
+        else:
+            matches = [item]
+        for path in matches:
+            path = os.path.abspath(path)
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def load_passwords(password_file=None, password_map=None):
+    # Returns (default password, {file name or path: password}).
+    default = None
+    if password_file:
+        with open(password_file, encoding='utf-8') as fo:
+            default = fo.readline().rstrip("\r\n") or None
+    mapping = {}
+    if password_map:
+        with open(password_map, encoding='utf-8') as fo:
+            mapping = json.load(fo)
+    return default, mapping
+
+
+def password_for(pdf_path, default, mapping):
+    for key in (pdf_path, os.path.basename(pdf_path)):
+        if key in mapping:
+            return mapping[key]
+    return default
+
+
+def range_suffix(date_range):
+    # "_2024-03-01_2024-03-31", named like txn_store.export_range, so a date
+    # range never overwrites the outputs of the whole statement.
+    if date_range is None:
+        return ""
+    start, end = date_range
+    return f"_{'start' if start is None else format_date(start)}_{'end' if end is None else format_date(end)}"
+
+
+def convert_file(pdf_path, output_dir, password=None, outputs=OUTPUTS, workers=1, cache=None, rules=None, stats=None,
+                 layout=False, date_range=None):
+    start = time.perf_counter()
+    stage = stats.stage if stats is not None else (lambda name: nullcontext())
+    if cache is not None:
+        txns = load_transactions_cached(pdf_path, password, workers, cache=cache, stats=stats, layout=layout,
+                                        date_range=date_range)
+    else:
+        txns = load_transactions(pdf_path, password, workers, stats=stats, layout=layout, date_range=date_range)
+
+    files = {}
+    summary_file = None
+    suffix = range_suffix(date_range)
+    if "plain" in outputs:
+        files["plain"] = get_output_path(pdf_path, suffix + ".csv", output_dir)
+    if "grouped" in outputs:
+        files["grouped"] = get_output_path(pdf_path, suffix + "_grouped.csv", output_dir)
+        summary_file = get_output_path(pdf_path, suffix + SUMMARY_SUFFIX, output_dir)
+    if "cashew" in outputs:
+        files["cashew"] = get_output_path(pdf_path, suffix + "_cashew.csv", output_dir)
+    columnar = [name for name in COLUMNAR_OUTPUTS if name in outputs]
+    if columnar and not isinstance(txns, list):
+        txns = list(txns)
+
+    # One pass writes every output, so transactions stream straight from
+    # the parser (into the parse cache too, on a miss).
+    with stage("write_outputs"):
+        count = write_outputs(txns, files.get("plain"), files.get("grouped"), files.get("cashew"), rules=rules,
+                              summary_file=summary_file).count
+    if not count:
+        for path in files.values():
+            os.remove(path)
+        raise ValueError("No transactions found.")
+    if summary_file:
+        files["summary"] = summary_file
+    for name in columnar:
+        files[name] = get_output_path(pdf_path, suffix + COLUMNAR_OUTPUTS[name], output_dir)
+        with stage("write_" + name):
+            write_columnar(txns, files[name])
+
+    if stats is not None:
+        stats.count("transactions", count)
+    return {"count": count, "files": files, "seconds": time.perf_counter() - start}
+
+
+def _convert_one(args):
+    # instrument is None, or Stats options when per-file stats are wanted.
+    pdf_path, output_dir, password, outputs, cache, rules, instrument, layout, date_range = args
+    stats = Stats(**instrument) if instrument is not None else None
+    try:
+        if stats is None:
+            result = convert_file(pdf_path, output_dir, password, outputs, cache=cache, rules=rules, layout=layout,
+                                  date_range=date_range)
+        else:
+            with stats:
+                result = convert_file(pdf_path, output_dir, password, outputs, cache=cache, rules=rules,
+                                      stats=stats, layout=layout, date_range=date_range)
+            result["stats"] = stats.to_dict()
+        return pdf_path, result, None
+    except Exception as e:
+        return pdf_path, None, str(e) or e.__class__.__name__
+
+
+def convert_many(pdf_paths, output_dir, passwords=(None, {}), outputs=OUTPUTS, jobs=None, cache=None, rules=None,
+                 instrument=None, layout=False, date_range=None):
+    # Yields (pdf_path, result, error) in completion order.
+    default, mapping = passwords
+    tasks = [(path, output_dir, password_for(path, default, mapping), outputs, cache, rules, instrument,
+              layout, date_range) for path in pdf_paths]
+    if not tasks:
+        return
+    with ProcessPoolExecutor(max_workers=min(jobs or os.cpu_count() or 1, len(tasks))) as pool:
+        futures = [pool.submit(_convert_one, task) for task in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="phonepe_cli",
+        description="Convert PhonePe statement PDFs to CSV without the GUI."
+    )
+    parser.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns")
+    parser.add_argument("-o", "--output-dir", default="output", help="directory for the generated files")
+    parser.add_argument("--password-file", help="file whose first line is the password for all PDFs")
+    parser.add_argument("--password-map", help="JSON file mapping PDF file names or paths to passwords")
+    parser.add_argument("--outputs", default=",".join(OUTPUTS),
+                        help="comma-separated outputs to write: plain, grouped, cashew, arrow, parquet "
+                             "(default: plain,grouped,cashew)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of files converted in parallel")
+    parser.add_argument("--no-cache", action="store_true", help="always re-parse instead of using the parse cache")
+    parser.add_argument("--cache-dir", help="parse cache directory (default: output/.cache or $PHONEPE_CACHE_DIR)")
+    parser.add_argument("--rules", help="category rules file for the Cashew export (default: category_rules.json)")
+    parser.add_argument("--layout", action="store_true",
+                        help="read the statement table by word positions (keeps wrapped payees intact)")
+    parser.add_argument("--from", dest="start", help="only convert transactions on or after this date, yyyy-mm-dd")
+    parser.add_argument("--to", dest="end", help="only convert transactions on or before this date, yyyy-mm-dd")
+    parser.add_argument("--stats-json", help="write per-file stage timings and parser counters as JSON ('-' for stdout)")
+    parser.add_argument("--profile", action="store_true", help="include a cProfile summary in --stats-json")
+    parser.add_argument("--trace-memory", action="store_true", help="include tracemalloc peaks in --stats-json")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    outputs = tuple(o.strip() for o in args.outputs.split(",") if o.strip())
+    unknown = set(outputs) - set(OUTPUTS) - set(COLUMNAR_OUTPUTS)
+    if unknown or not outputs:
+        print(f"Unknown outputs: {', '.join(sorted(unknown)) or args.outputs!r}", file=sys.stderr)
+        return 2
+
+    try:
+        date_range = None
+        if args.start or args.end:
+            date_range = (day_number(args.start) if args.start else None, day_number(args.end) if args.end else None)
+    except ValueError as e:
+        print(f"Invalid date: {e}", file=sys.stderr)
+        return 2
+
+    pdf_paths = expand_inputs(args.inputs)
+    if not pdf_paths:
+        print("No PDF files found.", file=sys.stderr)
+        return 2
+
+    output_dir = os.path.abspath(args.output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    passwords = load_passwords(args.password_file, args.password_map)
+    cache = None if args.no_cache else ParseCache(args.cache_dir)
+    rules = load_rules(args.rules) if "cashew" in outputs else None
+    instrument = None
+    if args.stats_json:
+        instrument = {"profile": args.profile, "trace_memory": args.trace_memory}
+
+    # With --stats-json - the JSON goes to stdout, so progress goes to stderr.
+    log = sys.stderr if args.stats_json == "-" else sys.stdout
+    failures = 0
+    all_stats = {}
+    for pdf_path, result, error in convert_many(pdf_paths, output_dir, passwords, outputs, args.jobs, cache, rules,
+                                                instrument, args.layout, date_range):
+        name = os.path.basename(pdf_path)
+        if error:
+            failures += 1
+            print(f"FAIL  {name}: {error}", file=log)
+        else:
+            written = ", ".join(os.path.basename(f) for f in result["files"].values())
+            print(f"OK    {name}: {result['count']} transactions in {result['seconds']:.2f}s -> {written}", file=log)
+            if "stats" in result:
+                all_stats[pdf_path] = result["stats"]
+
+    print(f"{len(pdf_paths) - failures} converted, {failures} failed", file=log)
+    if args.stats_json:
+        report = json.dumps({"files": all_stats}, indent=2)
+        if args.stats_json == "-":
+            print(report)
+        else:
+            with open(args.stats_json, 'w', encoding='utf-8') as fo:
+                fo.write(report + "\n")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,827 @@
+import os
+import re
+import sys
+import csv
+import datetime
+import itertools
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+from enum import Enum
+from functools import lru_cache
+from statistics import mean
+
+# PyMuPDF and the process pool are imported where they are used: parsing and
+# CSV writing don't need them, and this module is meant to be cheap to import.
+
+# Bump whenever parsing changes the transactions produced for the same PDF;
+# cached parse results (parse_cache.py) are keyed on it.
+PARSER_VERSION = 1
+
+# Statements shorter than this are extracted in this process even when more
+# workers are allowed; starting the pool would cost more than it saves.
+PARALLEL_MIN_PAGES = 500
+
+START_OF_RECORD_MARKER = re.compile(r'^[A-Z][a-z][a-z]\s\d{2},\s20\d{2}$')
+V2_PAYEE_PATTERN = re.compile(r'Paid to|Received from|Refund|Payment to')
+AMOUNT_PATTERN = re.compile(r'[\d,]+(?:\.\d+)?')
+
+MONTHS = {name: i for i, name in enumerate(
+    ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], 1)}
+DAYS_IN_MONTH = [0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+CSV_HEADER = ["Date", "Time", "Payee", "Transaction ID", "UTR No.", "Payer", "Type", "Amount"]
+
+class TxnKind(str, Enum):
+    DEBIT = "DEBIT"
+    CREDIT = "CREDIT"
+
+    __str__ = str.__str__
+    __format__ = str.__format__
+
+def to_kind(text):
+    # Known kinds become TxnKind members (which still compare equal to their
+    # string value); anything else is kept as the string from the statement.
+    return TxnKind._value2member_map_.get(text) or sys.intern(text)
+
+@lru_cache(maxsize=65536)
+def format_date(day):
+    return datetime.date.fromordinal(EPOCH_ORDINAL + day).strftime("%Y-%m-%d")
+
+@lru_cache(maxsize=1440)
+def format_time(seconds):
+    hour, minute = divmod(seconds // 60, 60)
+    return f"{hour % 12 or 12:02d}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+def format_amount(paise):
+    # -550 -> "₹-5.50"; floor division would give "₹-6.50".
+    sign = "-" if paise < 0 else ""
+    rupees, paise = divmod(abs(paise), 100)
+    return f"₹{sign}{rupees}.{paise:02d}"
+
+def to_paise(text):
+    # "1234.5" -> 123450. Amounts with more than two decimals are rounded.
+    whole, _, frac = text.partition(".")
+    if len(frac) <= 2 and (whole + frac).isdigit():
+        return int(whole or "0") * 100 + int(frac.ljust(2, "0"))
+    return round(float(text) * 100)
+
+def day_number(date_text):
+    # "yyyy-mm-dd" -> days since 1970-01-01, as in PhonePeTxn.day
+    return datetime.date.fromisoformat(date_text).toordinal() - EPOCH_ORDINAL
+
+def to_timestamp(dt):
+    # Seconds since 1970-01-01 in statement-local time (no timezone).
+    return (dt.toordinal() - EPOCH_ORDINAL) * 86400 + dt.hour * 3600 + dt.minute * 60
+
+class PhonePeTxn:
+    # Compact record: the amount is kept in paise, the date and time as a
+    # timestamp and the kind as a TxnKind. The string forms used in the CSV
+    # outputs are only built on access. category and note are optional extras
+    # that callers may set for the Cashew export.
+    __slots__ = ("timestamp", "payee", "txn_id", "utr_no", "payer", "kind", "paise", "category", "note")
+
+    def __init__(self, timestamp, payee, txn_id, utr_no, payer, kind, paise):
+        self.timestamp = timestamp
+        self.payee = sys.intern(payee)
+        self.txn_id = txn_id
+        self.utr_no = utr_no
+        self.payer = sys.intern(payer)
+        self.kind = to_kind(kind)
+        self.paise = paise
+
+    @property
+    def day(self):
+        return self.timestamp // 86400
+
+    @property
+    def date(self):
+        return format_date(self.timestamp // 86400)
+
+    @property
+    def time(self):
+        return format_time(self.timestamp % 86400)
+
+    @property
+    def datetime(self):
+        return datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=self.timestamp)
+
+    @property
+    def amount(self):
+        return format_amount(self.paise)
+
+    def to_row(self):
+        return [self.date, self.time, self.payee, self.txn_id, self.utr_no, self.payer, str(self.kind), self.amount]
+
+def get_output_path(pdf_path, suffix=".csv", output_dir=None):
+    if output_dir is None:
+        app_dir = os.path.dirname(os.path.abspath(__file__))
+        output_dir = os.path.join(app_dir, "output")
+    os.makedirs(output_dir, exist_ok=True)
+    # Only the extension is replaced, whatever its case ("A.PDF" -> "A.csv").
+    base_name = os.path.splitext(os.path.basename(pdf_path))[0] + suffix
+    return os.path.join(output_dir, base_name)
+
+def open_pdf(pdf_path, password=None):
+    import fitz  # PyMuPDF
+    doc = fitz.open(pdf_path)
+    if doc.needs_pass:
+        if not password or not doc.authenticate(password):
+            doc.close()
+            raise RuntimeError("Password required or incorrect password.")
+    return doc
+
+def iter_pdf_pages(pdf_path, password=None, progress=None, pages=None):
+    # Open and authenticate eagerly so password errors surface at call time,
+    # then hand back a generator that yields one page of text at a time.
+    # progress(pages_done, page_count) is called after each page; it may raise
+    # to stop extraction early. pages=(first, stop) limits extraction to a
+    # page span, e.g. from find_page_span.
+    doc = open_pdf(pdf_path, password)
+    first, stop = pages or (0, doc.page_count)
+
+    def page_texts():
+        with doc:
+            for page in doc.pages(first, stop):
+                text = page.get_text()
+                if progress:
+                    progress(page.number + 1 - first, stop - first)
+                yield text
+
+    return page_texts()
+
+def extract_text_from_pdf(pdf_path, password=None):
+    return "".join(iter_pdf_pages(pdf_path, password))
+
+def default_workers():
+    return os.cpu_count() or 1
+
+def page_days(page):
+    # (earliest, latest) day of the records on a page, or None if it has none.
+    days = [txn.day for txn in parse_transactions(page.get_text())]
+    return (min(days), max(days)) if days else None
+
+def find_page_span(doc, start=None, end=None):
+    # Pages [first, stop) holding the records dated start..end (day numbers,
+    # both inclusive, either may be None). Statements are in date order,
+    # newest or oldest first, so a binary search over a few probed pages
+    # finds the span; one page of margin on each side keeps records that
+    # cross a page boundary whole. Callers still filter by date.
+    page_count = doc.page_count
+    probed = {}
+
+    def probe(i):
+        if i not in probed:
+            probed[i] = page_days(doc[i])
+        return probed[i]
+
+    def days(i):
+        # Pages without records (cover, terms) take the dates of the nearest
+        # earlier page with records; None before the first one.
+        while i >= 0 and probe(i) is None:
+            i -= 1
+        return probe(i) if i >= 0 else None
+
+    def first_page(test):
+        # First page whose dates pass test (page_count if none); test must
+        # only turn true once along the statement.
+        lo, hi = 0, page_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found = days(mid)
+            if found is not None and test(*found):
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    last = days(page_count - 1)
+    if last is None:
+        return 0, page_count
+    first_found = next(probe(i) for i in range(page_count) if probe(i) is not None)
+    newest_first = first_found[0] > last[0]
+
+    if newest_first:
+        first = first_page(lambda lo, hi: lo <= end) if end is not None else 0
+        stop = first_page(lambda lo, hi: hi < start) if start is not None else page_count
+    else:
+        first = first_page(lambda lo, hi: hi >= start) if start is not None else 0
+        stop = first_page(lambda lo, hi: lo > end) if end is not None else page_count
+    return max(0, first - 1), min(page_count, max(stop, first) + 1)
+
+def in_date_range(txns, start=None, end=None):
+    # Transactions dated start..end (day numbers, inclusive, either may be None).
+    for txn in txns:
+        day = txn.timestamp // 86400
+        if (start is None or day >= start) and (end is None or day <= end):
+            yield txn
+
+def _extract_chunk(args):
+    # Runs in a worker process: each worker opens its own document.
+    pdf_path, password, start, stop = args
+    with open_pdf(pdf_path, password) as doc:
+        text = "".join(doc[i].get_text() for i in range(start, stop))
+    return split_chunk(text)
+
+def iter_pdf_chunks(pdf_path, password=None, workers=None, progress=None, pages=None):
+    # Parallel counterpart of map(split_chunk, iter_pdf_pages(...)): page
+    # ranges are extracted and split into records across a process pool and
+    # yielded in page order, ready to be stitched by iter_records. Workers
+    # are spawned rather than forked, as the GUI calls this from a QThread
+    # and forking a multithreaded process can deadlock.
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    workers = workers or default_workers()
+    if pages is None:
+        with open_pdf(pdf_path, password) as doc:
+            pages = (0, doc.page_count)
+    first, last = pages
+    page_count = last - first
+    if workers == 1 or page_count < PARALLEL_MIN_PAGES:
+        return map(split_chunk, iter_pdf_pages(pdf_path, password, progress, pages))
+
+    # A few ranges per worker keeps the pool busy when pages vary in size.
+    size = max(1, -(-page_count // (workers * 4)))
+    ranges = [(pdf_path, password, start, min(start + size, last))
+              for start in range(first, last, size)]
+
+    def chunks():
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(ranges) or 1),
+                                   mp_context=multiprocessing.get_context("spawn"))
+        try:
+            for (_, _, _, stop), chunk in zip(ranges, pool.map(_extract_chunk, ranges)):
+                if progress:
+                    progress(stop - first, page_count)
+                yield chunk
+        finally:
+            # Don't wait for queued ranges if the consumer stopped early.
+            pool.shutdown(cancel_futures=True)
+
+    return chunks()
+
+TABLE_HEADER = ["Date", "Transaction", "Details", "Type", "Amount"]
+
+def find_table_columns(words):
+    # Locate the "Date  Transaction Details  Type  Amount" header among a
+    # page's words (PyMuPDF get_text("words") tuples). Returns the left edges
+    # of the four columns and the bottom of the header, or None.
+    texts = [w[4] for w in words]
+    i = -1
+    while True:
+        try:
+            i = texts.index("Date", i + 1)
+        except ValueError:
+            return None
+        if texts[i:i + 5] != TABLE_HEADER:
+            continue
+        header = words[i:i + 5]
+        # Table columns are far apart on one line; the same words in running
+        # text are only a space apart.
+        height = header[0][3] - header[0][1]
+        if any(abs(w[3] - header[0][3]) > height / 2 for w in header):
+            continue
+        if any(header[j + 1][0] - header[j][2] < height for j in (0, 2, 3)):
+            continue
+        edges = (header[0][0], header[1][0], header[3][0], header[4][0])
+        return edges, max(w[3] for w in header)
+
+def layout_page_rows(words, edges, top):
+    # Assign words below the header to columns by x position and split them
+    # into rows at each date in the Date column. Returns (lead, rows): rows
+    # are [date lines, detail lines, type lines, amount lines]; lead holds the
+    # lines above the first date, which continue the previous page's last row.
+    cells = []
+    starts = []
+    # Words come grouped by (block, line); a text line is only split further
+    # when it runs across a column edge.
+    for _, line in itertools.groupby(words, key=lambda w: (w[5], w[6])):
+        line = list(line)
+        x0, y0, _, y1 = line[0][:4]
+        if y0 < top:
+            continue
+        col = 0
+        while col < 3 and x0 + 1 >= edges[col + 1]:
+            col += 1
+        if col < 3 and line[-1][0] + 1 >= edges[col + 1]:
+            for w in line:
+                col = 0
+                while col < 3 and w[0] + 1 >= edges[col + 1]:
+                    col += 1
+                cells.append((w[3], col, w[0], w[4], w[3] - w[1]))
+            continue
+        text = " ".join(w[4] for w in line) if len(line) > 1 else line[0][4]
+        cells.append((y1, col, x0, text, y1 - y0))
+        if col == 0 and START_OF_RECORD_MARKER.match(text):
+            starts.append(y0)
+    cells.sort()
+    starts.sort()
+
+    lead = [[], [], [], []]
+    rows = [[[], [], [], []] for _ in starts]
+    last_y = [[None] * 4 for _ in starts]
+    row = -1
+    for y, col, _, text, height in cells:
+        while row + 1 < len(starts) and y - height / 2 >= starts[row + 1] - 1:
+            row += 1
+        if row < 0:
+            lead[col].append(text)
+            continue
+        # A large vertical gap ends the row, so page footers below the last
+        # row are not taken for part of it.
+        prev = last_y[row][col]
+        if y - (starts[row] if prev is None else prev) > 2.5 * height:
+            continue
+        if prev is not None and abs(y - prev) < height / 2 and rows[row][col]:
+            rows[row][col][-1] += " " + text  # words split off the same line
+        else:
+            rows[row][col].append(text)
+        last_y[row][col] = y
+
+    return lead, rows
+
+def iter_layout_rows(pdf_path, password=None, progress=None, pages=None):
+    # Rows of the statement table, using word coordinates instead of the
+    # order of lines in the plain text. Returns None when the first pages
+    # have no table header, so the caller can fall back to text extraction.
+    # pages=(first, stop) limits the rows to a page span.
+    doc = open_pdf(pdf_path, password)
+    first, stop = pages or (0, doc.page_count)
+    table = None
+    for page in doc.pages(0, min(2, doc.page_count)):
+        table = find_table_columns(page.get_text("words"))
+        if table:
+            break
+    if table is None:
+        doc.close()
+        return None
+
+    def rows():
+        nonlocal table
+        pending = None
+        with doc:
+            for page in doc.pages(first, stop):
+                words = page.get_text("words")
+                # Pages without a header reuse the previous page's columns.
+                found = find_table_columns(words)
+                edges, top = found or (table[0], 0)
+                if found:
+                    table = found
+                lead, page_rows = layout_page_rows(words, edges, top)
+                if pending is not None:
+                    for cell, more in zip(pending, lead):
+                        cell.extend(more)
+                    if page_rows:
+                        yield pending
+                        pending = None
+                if page_rows:
+                    yield from page_rows[:-1]
+                    pending = page_rows[-1]
+                if progress:
+                    progress(page.number + 1 - first, stop - first)
+        if pending is not None:
+            yield pending
+
+    return rows()
+
+def layout_record(cells):
+    # Build a transaction from table cells. Same fields as mk_record_v1 /
+    # mk_record_v2, but a payee wrapped over several lines stays intact.
+    dates, details, types, amounts = cells
+    if len(dates) < 2 or not types or not amounts:
+        return None
+    timestamp = parse_date_time(dates[0], dates[1])
+    if timestamp is None:
+        return None
+    for i, line in enumerate(details):
+        if line.startswith("Transaction ID"):
+            break
+    else:
+        return None
+    if i == 0 or i + 1 >= len(details) or not details[i + 1].startswith("UTR No"):
+        return None
+    rest = details[i + 2:]
+    if len(rest) > 1 and rest[0] in ("Debited from", "Credited to"):
+        payer = rest[1]  # v1: account on its own line
+    else:
+        payer = rest[0].strip() if rest else ""
+    match = AMOUNT_PATTERN.search(" ".join(amounts))
+    try:
+        paise = to_paise(match.group().replace(',', '')) if match else 0
+    except ValueError:
+        return None
+    return PhonePeTxn(
+        timestamp=timestamp,
+        payee=" ".join(details[:i]).strip(),
+        txn_id=details[i].split()[-1],
+        utr_no="\t" + details[i + 1].split()[-1],
+        payer=payer,
+        kind=types[0].strip(),
+        paise=paise
+    )
+
+def parse_layout_rows(rows, counts=None):
+    for cells in rows:
+        txn = layout_record(cells)
+        if counts is not None:
+            counts["layout" if txn else "dropped"] += 1
+        if txn:
+            yield txn
+
+def split_chunk(text):
+    # Split a page (or run of pages) into (head, lead, records, tail).
+    # head and tail are the first and last lines, which may continue into the
+    # neighbouring chunk; lead holds lines before the first record marker.
+    lines = text.split('\n')
+    tail = lines.pop()
+    if not lines:
+        return None, [], [], tail
+
+    lead = []
+    records = []
+    for l in lines[1:]:
+        if START_OF_RECORD_MARKER.match(l):
+            records.append([l])
+        elif records:
+            records[-1].append(l)
+        else:
+            lead.append(l)
+    return lines[0], lead, records, tail
+
+def iter_records(chunks):
+    # Stitch split chunks back together and yield one record (list of lines)
+    # at a time. The result is the same as splitting the concatenated text
+    # after strip(), so records spanning page boundaries are kept intact.
+    rec = []
+    started = False
+    pending = ""
+
+    # A trailing empty chunk flushes the final line through the same logic.
+    for head, lead, records, tail in itertools.chain(chunks, [("", [], [], "")]):
+        if head is None:
+            pending += tail
+            continue
+
+        for l in [pending + head] + lead:
+            if not started:
+                l = l.lstrip()
+                if not l:
+                    continue
+                started = True
+            if START_OF_RECORD_MARKER.match(l):
+                if rec:
+                    yield rec
+                rec = [l]
+            else:
+                rec.append(l)
+
+        for r in records:
+            if rec:
+                yield rec
+            rec = r
+            started = True
+        pending = tail
+
+    if rec:
+        # Trailing whitespace is stripped from the statement as a whole, which
+        # can turn the last line into a record marker of its own.
+        rec = "\n".join(rec).rstrip().split('\n')
+        if len(rec) > 1 and START_OF_RECORD_MARKER.match(rec[-1]):
+            yield rec[:-1]
+            rec = rec[-1:]
+        yield rec
+
+def parse_records(records, parser=None):
+    parser = parser or RecordParser()
+    for rec in records:
+        txn = parser(rec)
+        if txn:
+            yield txn
+
+def parse_transactions(source, parser=None):
+    # source is either the full statement text or an iterable of page texts
+    # (e.g. from iter_pdf_pages); transactions are yielded as records close.
+    chunks = [split_chunk(source)] if isinstance(source, str) else map(split_chunk, source)
+    return parse_records(iter_records(chunks), parser)
+
+def load_transactions(pdf_path, password=None, workers=1, progress=None, stats=None, layout=False, date_range=None):
+    # workers > 1 extracts page ranges in parallel; the output is identical
+    # to the sequential path since both feed the same iter_records stitching.
+    # stats (instrumentation.Stats) times extraction and parsing separately
+    # and collects the parser's counters. layout=True reads the statement
+    # table by word coordinates (sequentially), falling back to text
+    # extraction for PDFs without a table header. date_range=(start, end)
+    # in day numbers (either may be None) only extracts the pages that can
+    # hold those dates and yields the transactions within them.
+    pages = None
+    if date_range is not None:
+        with open_pdf(pdf_path, password) as doc:
+            with stats.stage("find_pages") if stats is not None else nullcontext():
+                pages = find_page_span(doc, *date_range)
+            if stats is not None:
+                stats.count("pages_skipped", doc.page_count - (pages[1] - pages[0]))
+
+    rows = iter_layout_rows(pdf_path, password, progress, pages) if layout else None
+    if rows is not None:
+        if stats is None:
+            txns = parse_layout_rows(rows)
+        else:
+            txns = stats.timed_iter("parse", parse_layout_rows(stats.timed_iter("extract", rows), stats.counters))
+    else:
+        if workers > 1:
+            chunks = iter_pdf_chunks(pdf_path, password, workers, progress, pages)
+        else:
+            chunks = map(split_chunk, iter_pdf_pages(pdf_path, password, progress, pages))
+        if stats is None:
+            txns = parse_records(iter_records(chunks))
+        else:
+            parser = stats.watch(RecordParser())
+            txns = stats.timed_iter("parse", parse_records(iter_records(stats.timed_iter("extract", chunks)), parser))
+    return txns if date_range is None else in_date_range(txns, *date_range)
+
+def try_all_parsers(rec):
+    for parser in [mk_record_v1, mk_record_v2]:
+        txn = parser(rec)
+        if txn:
+            return txn
+    return None
+
+def mk_record_v1(r):
+    try:
+        if len(r) < 8:
+            return None
+        # Check if r[2] is a known kind and r[3] starts with ₹ or is numeric
+        if not r[3].lstrip().startswith("₹") and not r[3].replace(",", "").strip().replace(".", "").isdigit():
+            return None
+        dt = datetime.datetime.strptime(r[0] + " " + r[1], "%b %d, %Y %I:%M %p")
+        kind = r[2].strip()
+        paise = to_paise(r[3].replace("₹", "").replace(",", "").strip())
+        payee = r[4].strip()
+        txn_id = r[5].split()[-1] if len(r) > 5 else ""
+        utr_no = "\t" + r[6].split()[-1] if len(r) > 6 else ""
+        payer = r[8] if len(r) > 8 else ""
+        return PhonePeTxn(
+            timestamp=to_timestamp(dt),
+            payee=payee,
+            txn_id=txn_id,
+            utr_no=utr_no,
+            payer=payer,
+            kind=kind,
+            paise=paise
+        )
+    except Exception:
+        return None
+
+def mk_record_v2(r):
+    try:
+        if len(r) < 8:
+            return None
+        if not any(keyword in r[2] for keyword in ["Paid to", "Received from", "Refund", "Payment to"]):
+            return None
+
+        dt = datetime.datetime.strptime(r[0] + " " + r[1], "%b %d, %Y %I:%M %p")
+        payee = r[2].strip()
+        txn_id = r[3].split()[-1]
+        utr_no = "\t" + r[4].split()[-1]
+        payer = r[5].strip()
+        kind = r[6].strip()
+        amount_line = r[8].strip() if len(r) > 8 and r[7].strip().endswith("INR") else r[7].strip()
+        match = re.search(r'[\d,]+(?:\.\d+)?', amount_line)
+        paise = to_paise(match.group().replace(',', '')) if match else 0
+
+        return PhonePeTxn(
+            timestamp=to_timestamp(dt),
+            payee=payee,
+            txn_id=txn_id,
+            utr_no=utr_no,
+            payer=payer,
+            kind=kind,
+            paise=paise
+        )
+    except Exception:
+        return None
+
+def _parse_date(date_line):
+    # "Mmm dd, yyyy" -> days since 1970-01-01
+    if len(date_line) != 12 or not date_line.isascii():
+        return None
+    month = MONTHS.get(date_line[:3])
+    day = date_line[4:6]
+    year = date_line[8:]
+    if month is None or date_line[3] != " " or date_line[6:8] != ", " or not (day + year).isdigit():
+        return None
+    d = int(day)
+    y = int(year)
+    leap = month == 2 and y % 4 == 0 and (y % 100 != 0 or y % 400 == 0)
+    if not 1 <= d <= DAYS_IN_MONTH[month] + leap:
+        return None
+    return datetime.date(y, month, d).toordinal() - EPOCH_ORDINAL
+
+def _parse_time(time_line):
+    # "hh:mm AM" -> seconds since midnight
+    if len(time_line) != 8 or not time_line.isascii():
+        return None
+    hour = time_line[:2]
+    minute = time_line[3:5]
+    if time_line[2] != ":" or time_line[5] != " " or time_line[6:] not in ("AM", "PM"):
+        return None
+    if not (hour + minute).isdigit() or not 1 <= int(hour) <= 12 or int(minute) > 59:
+        return None
+    return ((int(hour) % 12 + (12 if time_line[6] == "P" else 0)) * 60 + int(minute)) * 60
+
+_DATE_CACHE = {}
+_TIME_CACHE = {}
+
+def parse_date_time(date_line, time_line):
+    # Hand-rolled equivalent of strptime(date + " " + time, "%b %d, %Y %I:%M %p")
+    # for the canonical "Mmm dd, yyyy" / "hh:mm AM" layout. Returns the
+    # timestamp, or None for anything else. Statements repeat the same dates
+    # and times a lot, so the parsed parts are memoized.
+    day = _DATE_CACHE.get(date_line, False)
+    if day is False:
+        day = _parse_date(date_line)
+        if len(_DATE_CACHE) < 8192:
+            _DATE_CACHE[date_line] = day
+    seconds = _TIME_CACHE.get(time_line, False)
+    if seconds is False:
+        seconds = _parse_time(time_line)
+        if len(_TIME_CACHE) < 8192:
+            _TIME_CACHE[time_line] = seconds
+    if day is None or seconds is None:
+        return None
+    return day * 86400 + seconds
+
+def fast_record_v1(r):
+    # Same result as mk_record_v1, or None whenever that can't be guaranteed
+    # cheaply, in which case the caller falls back to try_all_parsers.
+    if len(r) < 8:
+        return None
+    if not r[3].lstrip().startswith("₹") and not r[3].replace(",", "").strip().replace(".", "").isdigit():
+        return None
+    timestamp = parse_date_time(r[0], r[1])
+    txn_id = r[5].split()
+    utr_no = r[6].split()
+    if timestamp is None or not txn_id or not utr_no:
+        return None
+    try:
+        paise = to_paise(r[3].replace("₹", "").replace(",", "").strip())
+    except ValueError:
+        return None
+    return PhonePeTxn(
+        timestamp=timestamp,
+        payee=r[4].strip(),
+        txn_id=txn_id[-1],
+        utr_no="\t" + utr_no[-1],
+        payer=r[8] if len(r) > 8 else "",
+        kind=r[2].strip(),
+        paise=paise
+    )
+
+def fast_record_v2(r):
+    # Same result as try_all_parsers for v2 records, or None on any mismatch.
+    if len(r) < 8 or not V2_PAYEE_PATTERN.search(r[2]):
+        return None
+    # try_all_parsers prefers v1, so only take records v1 would reject.
+    if r[3].lstrip().startswith("₹") or r[3].replace(",", "").strip().replace(".", "").isdigit():
+        return None
+    timestamp = parse_date_time(r[0], r[1])
+    txn_id = r[3].split()
+    utr_no = r[4].split()
+    if timestamp is None or not txn_id or not utr_no:
+        return None
+
+    amount_line = r[8].strip() if len(r) > 8 and r[7].strip().endswith("INR") else r[7].strip()
+    match = AMOUNT_PATTERN.search(amount_line)
+    try:
+        paise = to_paise(match.group().replace(',', '')) if match else 0
+    except ValueError:
+        return None
+
+    return PhonePeTxn(
+        timestamp=timestamp,
+        payee=r[2].strip(),
+        txn_id=txn_id[-1],
+        utr_no="\t" + utr_no[-1],
+        payer=r[5].strip(),
+        kind=r[6].strip(),
+        paise=paise
+    )
+
+class RecordParser:
+    # Parses the first few records with the generic parsers to detect the
+    # statement layout, then dispatches straight to that layout's fast parser.
+    # Records the fast parser can't handle still go through the generic ones,
+    # in try_all_parsers order. counts tallies how each record was handled.
+    DETECT_RECORDS = 5
+    FAST_PARSERS = {mk_record_v1: fast_record_v1, mk_record_v2: fast_record_v2}
+    COUNTER_NAMES = {mk_record_v1: "v1", mk_record_v2: "v2", fast_record_v1: "fast_v1", fast_record_v2: "fast_v2"}
+
+    def __init__(self):
+        self.fast = None
+        self.layouts = Counter()
+        self.counts = Counter()
+
+    def __call__(self, rec):
+        if self.fast is not None:
+            txn = self.fast(rec)
+            if txn is not None:
+                self.counts[self.COUNTER_NAMES[self.fast]] += 1
+                return txn
+
+        for parser in [mk_record_v1, mk_record_v2]:
+            txn = parser(rec)
+            if txn:
+                self.counts[self.COUNTER_NAMES[parser]] += 1
+                if self.fast is None:
+                    self.layouts[parser] += 1
+                    if sum(self.layouts.values()) >= self.DETECT_RECORDS:
+                        self.fast = self.FAST_PARSERS[self.layouts.most_common(1)[0][0]]
+                return txn
+        self.counts["dropped"] += 1
+        return None
+
+def write_csv(txns, output_file):
+    with open(output_file, 'w', newline='', encoding='utf-8') as fo:
+        writer = csv.writer(fo)
+        writer.writerow(CSV_HEADER)
+        count = 0
+        for txn in txns:
+            writer.writerow(txn.to_row())
+            count += 1
+    return count
+
+@lru_cache(maxsize=65536)
+def week_key(day):
+    # Calendar year with the ISO week number, e.g. "2024-W7".
+    date = datetime.date.fromordinal(EPOCH_ORDINAL + day)
+    return f"{date.year}-W{date.isocalendar().week}"
+
+class GroupedSummary:
+    # Accumulates the grouped summary one transaction at a time, so it can be
+    # fed from the same pass that writes the other outputs.
+    def __init__(self):
+        self.grouped = {}  # (kind, payee) -> [count, paise], in first-seen order
+        self.debit_amounts = defaultdict(int)
+        self.credit_amounts = defaultdict(int)
+        self.daily_spending = defaultdict(int)
+        self.weekly_spending = defaultdict(int)
+        self.monthly_spending = defaultdict(int)
+
+    def add(self, txn):
+        amt = txn.paise
+        key = (txn.kind, txn.payee)
+        group = self.grouped.get(key)
+        if group is None:
+            self.grouped[key] = [1, amt]
+        else:
+            group[0] += 1
+            group[1] += amt
+
+        if txn.kind == TxnKind.DEBIT:
+            day = txn.day
+            self.debit_amounts[txn.payee] += amt
+            self.daily_spending[day] += amt
+            self.weekly_spending[week_key(day)] += amt
+            self.monthly_spending[format_date(day)[:7]] += amt  # yyyy-mm
+        elif txn.kind == TxnKind.CREDIT:
+            self.credit_amounts[txn.payee] += amt
+
+    def rows(self):
+        # Rows of the grouped summary CSV.
+        most_spent_to = max(self.debit_amounts.items(), key=lambda x: x[1], default=("None", 0))
+        most_received_from = max(self.credit_amounts.items(), key=lambda x: x[1], default=("None", 0))
+
+        rows = [["Type", "Payee", "Count", "Total Amount"]]
+        for (kind, payee), (count, paise) in self.grouped.items():
+            rows.append([kind, payee, count, format_amount(paise)])
+        rows += self.summary_rows(most_spent_to, most_received_from)
+        return rows
+
+    def summary_rows(self, most_spent_to, most_received_from):
+        # The rows after the groups; (payee, paise) pairs for the top payees.
+        most_spent_day = max(self.daily_spending.items(), key=lambda x: x[1], default=None)
+        most_spent_day = (format_date(most_spent_day[0]), most_spent_day[1]) if most_spent_day else ("None", 0)
+
+        daily, weekly, monthly = self.daily_spending, self.weekly_spending, self.monthly_spending
+        avg_day = mean(daily.values()) / 100 if daily else 0
+        avg_week = mean(weekly.values()) / 100 if weekly else 0
+        avg_month = mean(monthly.values()) / 100 if monthly else 0
+
+        return [
+            [],
+            ["Summary"],
+            ["Most Amount Sent To", most_spent_to[0], format_amount(most_spent_to[1])],
+            ["Most Amount Received From", most_received_from[0], format_amount(most_received_from[1])],
+            ["Most Spent Day", most_spent_day[0], format_amount(most_spent_day[1])],
+            ["Average Daily Spend", f"₹{avg_day:.2f}"],
+            ["Average Weekly Spend", f"₹{avg_week:.2f}"],
+            ["Average Monthly Spend", f"₹{avg_month:.2f}"],
+        ]
+
+def write_grouped_csv(txns, output_file):
+    summary = GroupedSummary()
+    for txn in txns:
+        summary.add(txn)
+    with open(output_file, 'w', newline='', encoding='utf-8') as fo:
+        csv.writer(fo).writerows(summary.rows())
+    return summary
@@ -0,0 +1,202 @@
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from category_rules import load_rules
+from fused_writer import write_outputs
+from parse_cache import file_hash, load_transactions_cached
+from phonepe_statement import PhonePeTxn, day_number
+from phonepe_cli import OUTPUTS, expand_inputs, load_passwords, password_for
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    txn_key TEXT PRIMARY KEY,
+    txn_id TEXT NOT NULL,
+    utr_no TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    payee TEXT NOT NULL,
+    payer TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    paise INTEGER NOT NULL,
+    statement TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transactions_utr_no ON transactions (utr_no);
+CREATE INDEX IF NOT EXISTS transactions_timestamp ON transactions (timestamp);
+CREATE TABLE IF NOT EXISTS statements (
+    hash TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    ingested_at INTEGER NOT NULL
+);
+"""
+
+UPSERT = """
+INSERT INTO transactions (txn_key, txn_id, utr_no, timestamp, payee, payer, kind, paise, statement)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (txn_key) DO UPDATE SET
+    txn_id = excluded.txn_id, utr_no = excluded.utr_no, timestamp = excluded.timestamp,
+    payee = excluded.payee, payer = excluded.payer, kind = excluded.kind,
+    paise = excluded.paise, statement = excluded.statement
+"""
+
+
+def default_db_path():
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(app_dir, "output", "transactions.db")
+
+
+def txn_key(txn):
+    # PhonePe transaction IDs are unique; fall back to the UTR number.
+    if txn.txn_id:
+        return txn.txn_id
+    return "utr:" + txn.utr_no.strip()
+
+
+class TxnStore:
+    # Deduplicated store of transactions from any number of (overlapping)
+    # statements. Re-ingesting a transaction updates it in place.
+    def __init__(self, db_path=None):
+        self.db_path = db_path or default_db_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def is_ingested(self, digest):
+        return self.conn.execute("SELECT 1 FROM statements WHERE hash = ?", (digest,)).fetchone() is not None
+
+    def upsert(self, txns, statement=""):
+        rows = ((txn_key(t), t.txn_id, t.utr_no, t.timestamp, t.payee, t.payer, str(t.kind), t.paise, statement)
+                for t in txns)
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(UPSERT, rows)
+            return self.conn.total_changes - before
+
+    def ingest(self, pdf_path, password=None, force=False):
+        # Returns the number of transactions upserted, or None when this
+        # exact statement was ingested before (unless force is set).
+        digest = file_hash(pdf_path)
+        if not force and self.is_ingested(digest):
+            return None
+        # Every upserted row counts as one change, so count is also the
+        # statement's number of transactions.
+        count = self.upsert(load_transactions_cached(pdf_path, password), digest)
+        if not count:
+            raise ValueError("No transactions found.")
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO statements (hash, path, count, ingested_at) VALUES (?, ?, ?, ?)",
+                (digest, os.path.abspath(pdf_path), count, int(time.time()))
+            )
+        return count
+
+    def query(self, start=None, end=None):
+        # Transactions between the start and end dates ("yyyy-mm-dd",
+        # inclusive), oldest first.
+        sql = "SELECT timestamp, payee, txn_id, utr_no, payer, kind, paise FROM transactions"
+        where = []
+        params = []
+        if start:
+            where.append("timestamp >= ?")
+            params.append(day_number(start) * 86400)
+        if end:
+            where.append("timestamp < ?")
+            params.append((day_number(end) + 1) * 86400)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY timestamp, rowid"
+        for row in self.conn.execute(sql, params):
+            yield PhonePeTxn(*row)
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+
+def export_range(store, output_dir, start=None, end=None, outputs=OUTPUTS, name="transactions", rules=None,
+                 group_memory_mb=None):
+    # Writes the requested outputs for a date range; returns {output: path}.
+    # group_memory_mb caps the memory for the grouped summary's payee groups,
+    # spilling them to temporary files past it (external_summary).
+    os.makedirs(output_dir, exist_ok=True)
+    suffix = f"_{start or 'start'}_{end or 'end'}"
+    files = {}
+    for output, file_suffix in (("plain", ".csv"), ("grouped", "_grouped.csv"), ("cashew", "_cashew.csv")):
+        if output in outputs:
+            files[output] = os.path.join(output_dir, f"{name}{suffix}{file_suffix}")
+    # Rows stream from SQLite into all outputs in one pass.
+    write_outputs(store.query(start, end), files.get("plain"), files.get("grouped"), files.get("cashew"), rules=rules,
+                  group_memory_mb=group_memory_mb)
+    return files
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="txn_store", description="Merge statements into a local transaction store.")
+    parser.add_argument("--db", help="SQLite database (default: output/transactions.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="add statements to the store")
+    ingest.add_argument("inputs", nargs="+", help="PDF files, directories or glob patterns")
+    ingest.add_argument("--password-file", help="file whose first line is the password for all PDFs")
+    ingest.add_argument("--password-map", help="JSON file mapping PDF file names or paths to passwords")
+    ingest.add_argument("--force", action="store_true", help="re-ingest statements that were ingested before")
+
+    export = commands.add_parser("export", help="write CSVs for a date range from the store")
+    export.add_argument("--from", dest="start", help="first date, yyyy-mm-dd")
+    export.add_argument("--to", dest="end", help="last date, yyyy-mm-dd")
+    export.add_argument("-o", "--output-dir", default="output")
+    export.add_argument("--outputs", default=",".join(OUTPUTS),
+                        help="comma-separated outputs to write: plain, grouped, cashew (default: all)")
+    export.add_argument("--rules", help="category rules file for the Cashew export (default: category_rules.json)")
+    export.add_argument("--max-memory-mb", type=float,
+                        help="memory for the grouped summary's payee groups; more are spilled to temporary files")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        try:
+            for date in (args.start, args.end):
+                if date:
+                    day_number(date)
+        except ValueError as e:
+            print(f"Invalid date: {e}", file=sys.stderr)
+            return 2
+
+    with TxnStore(args.db) as store:
+        if args.command == "ingest":
+            passwords = load_passwords(args.password_file, args.password_map)
+            failures = 0
+            for pdf_path in expand_inputs(args.inputs):
+                name = os.path.basename(pdf_path)
+                try:
+                    count = store.ingest(pdf_path, password_for(pdf_path, *passwords), args.force)
+                except Exception as e:
+                    failures += 1
+                    print(f"FAIL  {name}: {e}")
+                    continue
+                print(f"SKIP  {name}: already ingested" if count is None else f"OK    {name}: {count} transactions")
+            print(f"{store.count()} transactions in store")
+            return 1 if failures else 0
+
+        outputs = tuple(o.strip() for o in args.outputs.split(",") if o.strip())
+        if not outputs or set(outputs) - set(OUTPUTS):
+            print(f"Unknown outputs: {args.outputs!r}", file=sys.stderr)
+            return 2
+        rules = load_rules(args.rules) if "cashew" in outputs else None
+        files = export_range(store, os.path.abspath(args.output_dir), args.start, args.end, outputs, rules=rules,
+                             group_memory_mb=args.max_memory_mb)
+        for path in files.values():
+            print(path)
+        return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,256 @@
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from category_rules import load_rules
+from parse_cache import file_hash
+from phonepe_cli import COLUMNAR_OUTPUTS, OUTPUTS, _convert_one, is_pdf, load_passwords, password_for
+
+POLL_SECONDS = 5.0
+# A PDF is converted once its size and modification time have not changed
+# for this long, so statements still being copied in are left alone.
+SETTLE_SECONDS = 3.0
+STATE_FILE = ".watch_state.json"
+
+
+class WatchState:
+    # Content hashes of the statements converted so far, saved in the output
+    # directory so a restarted watcher (or a renamed copy of a statement)
+    # doesn't convert them again.
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, encoding='utf-8') as fo:
+                self.done = json.load(fo)
+        except (OSError, ValueError):
+            self.done = {}
+
+    def __contains__(self, digest):
+        return digest in self.done
+
+    def get(self, digest):
+        return self.done.get(digest)
+
+    def add(self, digest, pdf_path, count):
+        self.done[digest] = {"path": pdf_path, "count": count, "converted_at": time.strftime("%Y-%m-%d %H:%M:%S")}
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as fo:
+            json.dump(self.done, fo, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+class FolderScanner:
+    # Polls folders for PDFs that are new or changed since they were queued.
+    # A file is ready when its (size, mtime) matched the previous scan and is
+    # at least settle seconds old.
+    def __init__(self, folders, settle=SETTLE_SECONDS):
+        self.folders = folders
+        self.settle = settle
+        self.seen = {}     # path -> (size, mtime_ns) at the previous scan
+        self.queued = {}   # path -> (size, mtime_ns) when it was last queued
+
+    def scan(self, settled=True):
+        # Returns (ready paths, number of paths still settling). settled=False
+        # takes every new or changed file at once (for --once).
+        now = time.time()
+        ready = []
+        waiting = 0
+        seen = {}
+        for folder in self.folders:
+            try:
+                entries = sorted(os.scandir(folder), key=lambda e: e.name)
+            except OSError:
+                continue
+            for entry in entries:
+                if not is_pdf(entry.name):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                path = os.path.abspath(entry.path)
+                sig = seen[path] = (stat.st_size, stat.st_mtime_ns)
+                if self.queued.get(path) == sig:
+                    continue
+                if settled and (self.seen.get(path) != sig or now - stat.st_mtime < self.settle):
+                    waiting += 1
+                    continue
+                self.queued[path] = sig
+                ready.append(path)
+        self.seen = seen
+        return ready, waiting
+
+
+def start_observer(folders, wake):
+    # With watchdog installed, file system events (inotify and friends) wake
+    # the scan loop early. Without it the folders are only polled.
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            wake.set()
+
+    observer = Observer()
+    for folder in folders:
+        observer.schedule(Handler(), folder, recursive=False)
+    observer.daemon = True
+    observer.start()
+    return observer
+
+
+class StatusLog:
+    # Timestamped status lines, printed and appended to the log file.
+    def __init__(self, path=None, stream=sys.stdout):
+        self.stream = stream
+        self.fo = open(path, 'a', encoding='utf-8') if path else None
+
+    def __call__(self, message):
+        line = f"{time.strftime('%Y-%m-%d %H:%M:%S')} {message}"
+        print(line, file=self.stream, flush=True)
+        if self.fo is not None:
+            self.fo.write(line + "\n")
+            self.fo.flush()
+
+    def close(self):
+        if self.fo is not None:
+            self.fo.close()
+
+
+def watch(folders, output_dir, passwords=(None, {}), outputs=OUTPUTS, jobs=None, rules=None, layout=False,
+          interval=POLL_SECONDS, settle=SETTLE_SECONDS, once=False, log=print, stop=None):
+    # Converts PDFs dropped into the folders until stop is set (or, with
+    # once, until every PDF present at the start is done). At most jobs
+    # files are converted at a time and at most as many more wait in the
+    # pool; the rest stay queued here.
+    jobs = jobs or os.cpu_count() or 1
+    stop = stop or threading.Event()
+    wake = threading.Event()
+    state = WatchState(os.path.join(output_dir, STATE_FILE))
+    scanner = FolderScanner(folders, settle)
+    observer = None if once else start_observer(folders, wake)
+    log(f"Watching {', '.join(folders)} ({'events' if observer else f'polling every {interval:g}s'}) "
+        f"-> {output_dir}")
+
+    pending = deque()
+    running = {}  # future -> (pdf_path, digest)
+    failures = 0
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            while not stop.is_set():
+                ready, waiting = scanner.scan(settled=not once)
+                pending.extend(ready)
+
+                while pending and len(running) < jobs * 2:
+                    pdf_path = pending.popleft()
+                    name = os.path.basename(pdf_path)
+                    try:
+                        digest = file_hash(pdf_path)
+                    except OSError as e:
+                        log(f"FAIL  {name}: {e}")
+                        failures += 1
+                        continue
+                    if digest in state:
+                        log(f"SKIP  {name}: already converted from {os.path.basename(state.get(digest)['path'])}")
+                        continue
+                    if any(digest == d for _, d in running.values()):
+                        log(f"SKIP  {name}: same statement is being converted")
+                        continue
+                    task = (pdf_path, output_dir, password_for(pdf_path, *passwords), outputs, None, rules, None,
+                            layout, None)
+                    running[pool.submit(_convert_one, task)] = (pdf_path, digest)
+                    log(f"QUEUE {name}")
+
+                if once and not pending and not running:
+                    break
+                if running:
+                    done, _ = wait(running, timeout=None if once else min(interval, settle), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        _, digest = running.pop(future)
+                        pdf_path, result, error = future.result()
+                        name = os.path.basename(pdf_path)
+                        if error:
+                            failures += 1
+                            log(f"FAIL  {name}: {error}")
+                        else:
+                            state.add(digest, pdf_path, result["count"])
+                            written = ", ".join(os.path.basename(f) for f in result["files"].values())
+                            log(f"OK    {name}: {result['count']} transactions in {result['seconds']:.2f}s -> {written}")
+                elif not pending:
+                    # Files still settling are looked at again sooner.
+                    wake.wait(min(interval, settle) if waiting else interval)
+                    wake.clear()
+
+            for future in running:
+                future.cancel()
+    finally:
+        if observer is not None:
+            observer.stop()
+    log("Stopped.")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="watch_folder",
+        description="Convert PhonePe statement PDFs as they are dropped into a folder."
+    )
+    parser.add_argument("folders", nargs="+", help="folders to watch for PDF files")
+    parser.add_argument("-o", "--output-dir", default="output", help="directory for the generated files")
+    parser.add_argument("--password-file", help="file whose first line is the password for all PDFs")
+    parser.add_argument("--password-map", help="JSON file mapping PDF file names or paths to passwords")
+    parser.add_argument("--outputs", default=",".join(OUTPUTS),
+                        help="comma-separated outputs to write: plain, grouped, cashew, arrow, parquet "
+                             "(default: plain,grouped,cashew)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of files converted in parallel")
+    parser.add_argument("--rules", help="category rules file for the Cashew export (default: category_rules.json)")
+    parser.add_argument("--layout", action="store_true",
+                        help="read the statement table by word positions (keeps wrapped payees intact)")
+    parser.add_argument("--interval", type=float, default=POLL_SECONDS, help="seconds between folder scans")
+    parser.add_argument("--settle", type=float, default=SETTLE_SECONDS,
+                        help="seconds a PDF must stay unchanged before it is converted")
+    parser.add_argument("--log", help="status log file (default: <output-dir>/watch.log)")
+    parser.add_argument("--once", action="store_true", help="convert the PDFs already there and exit")
+    args = parser.parse_args(argv)
+
+    outputs = tuple(o.strip() for o in args.outputs.split(",") if o.strip())
+    if not outputs or set(outputs) - set(OUTPUTS) - set(COLUMNAR_OUTPUTS):
+        print(f"Unknown outputs: {args.outputs!r}", file=sys.stderr)
+        return 2
+    folders = [os.path.abspath(folder) for folder in args.folders]
+    missing = [folder for folder in folders if not os.path.isdir(folder)]
+    if missing:
+        print(f"Not a folder: {', '.join(missing)}", file=sys.stderr)
+        return 2
+
+    output_dir = os.path.abspath(args.output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    passwords = load_passwords(args.password_file, args.password_map)
+    rules = load_rules(args.rules) if "cashew" in outputs else None
+    log = StatusLog(args.log or os.path.join(output_dir, "watch.log"))
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    try:
+        failures = watch(folders, output_dir, passwords, outputs, args.jobs, rules, args.layout, args.interval,
+                         args.settle, args.once, log, stop)
+    except KeyboardInterrupt:
+        log("Stopped.")
+        failures = 0
+    finally:
+        log.close()
+    return 1 if args.once and failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())